@@ -5,10 +5,10 @@ This agent integrates with Railtracks for intelligent break scheduling.
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
-from anthropic import Anthropic
 
 from config import settings, prompts
 from tools.database_tools import get_db
+from tools.llm_client import get_anthropic_client
 from tools.notification_tools import get_notification_manager
 
 # Import Railtracks integration
@@ -27,7 +27,7 @@ class BreakSchedulerAgent:
         self.user_id = user_id
         self.db = get_db()
         self.notification_manager = get_notification_manager()
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
+        self.client = get_anthropic_client()
 
         # Get user preferences
         self.user = self.db.get_user(user_id)
@@ -157,6 +157,9 @@ Current time: {datetime.utcnow().strftime('%H:%M')}
             duration=duration,
             points_earned=points
         )
+        if activity is None:
+            # Same break logged moments ago (double click); nothing new earned
+            return {'success': False, 'duplicate': True, 'points_earned': 0}
 
         # Update last break time
         self.last_break_time = activity.timestamp
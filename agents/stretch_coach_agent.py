@@ -2,6 +2,7 @@
 
 This agent integrates with Railtracks for intelligent stretch coaching.
 """
+import functools
 import json
 from typing import Dict, Any, List, Optional
 from pathlib import Path
@@ -23,6 +24,28 @@ except ImportError:
     RAILTRACKS_ENABLED = False
 
 
+@functools.cache
+def load_stretch_library() -> Dict[str, Any]:
+    """Load the stretch library from JSON (once per process).
+
+    The library is static content shared by every coach, so callers must
+    treat it as read-only.
+    """
+    stretches_file = settings.DATA_DIR / "stretches.json"
+    if not stretches_file.exists():
+        print(f"Warning: {stretches_file} not found")
+        return {"stretches": [], "categories": {}, "routines": {}}
+
+    with open(stretches_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@functools.cache
+def load_stretch_index() -> Dict[str, Dict[str, Any]]:
+    """Get the stretch library's stretches keyed by ID (built once)."""
+    return {stretch['id']: stretch for stretch in load_stretch_library().get('stretches', [])}
+
+
 class StretchCoachAgent:
     """Agent for stretch guidance and tracking."""
 
@@ -34,16 +57,11 @@ class StretchCoachAgent:
 
         # Load stretch library
         self.stretches = self._load_stretches()
+        self._stretches_by_id = load_stretch_index()
 
     def _load_stretches(self) -> Dict[str, Any]:
         """Load stretch library from JSON."""
-        stretches_file = settings.DATA_DIR / "stretches.json"
-        if not stretches_file.exists():
-            print(f"Warning: {stretches_file} not found")
-            return {"stretches": [], "categories": {}, "routines": {}}
-
-        with open(stretches_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_stretch_library()
 
     def get_all_stretches(self) -> List[Dict[str, Any]]:
         """Get all available stretches."""
@@ -51,10 +69,7 @@ class StretchCoachAgent:
 
     def get_stretch_by_id(self, stretch_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific stretch by ID."""
-        for stretch in self.stretches.get('stretches', []):
-            if stretch['id'] == stretch_id:
-                return stretch
-        return None
+        return self._stretches_by_id.get(stretch_id)
 
     def get_stretches_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Get stretches in a specific category."""
@@ -127,13 +142,15 @@ class StretchCoachAgent:
         }
 
     def complete_stretch(self, stretch_id: str, photo_path: str = None,
-                        duration: int = None) -> Dict[str, Any]:
+                        duration: int = None, bonus_points: int = 0) -> Dict[str, Any]:
         """Record stretch completion.
 
         Args:
             stretch_id: ID of completed stretch
             photo_path: Optional path to verification photo
             duration: Optional actual duration in seconds
+            bonus_points: Extra points (e.g. for good form), added in the
+                same transaction as the stretch's own points
 
         Returns:
             Dictionary with completion details and points earned
@@ -155,11 +172,14 @@ class StretchCoachAgent:
             user_id=self.user_id,
             activity_type='stretch',
             duration=duration,
-            points_earned=points,
+            points_earned=points + bonus_points,
             stretch_name=stretch['name'],
             photo_verified=photo_path is not None,
             photo_path=photo_path
         )
+        if activity is None:
+            # Same stretch logged moments ago (double click); nothing new earned
+            return {'success': False, 'duplicate': True, 'points_earned': 0}
 
         # Update pet stats (stretches make pet happy!)
         pet = self.db.update_pet_stats(
@@ -173,6 +193,7 @@ class StretchCoachAgent:
             'success': True,
             'stretch_name': stretch['name'],
             'points_earned': points,
+            'bonus_points': bonus_points,
             'timestamp': activity.timestamp,
             'pet_health': pet.health if pet else None,
             'pet_happiness': pet.happiness if pet else None,
@@ -2,12 +2,14 @@
 
 This agent integrates with Railtracks for advanced agentic capabilities.
 """
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
 from datetime import datetime
-from anthropic import Anthropic
 
 from config import settings, prompts
 from tools.database_tools import get_db
+from tools.llm_client import get_anthropic_client
 
 # Import Railtracks integration
 try:
@@ -29,7 +31,7 @@ class WellnessCompanionAgent:
         """Initialize wellness companion agent."""
         self.user_id = user_id
         self.db = get_db()
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
+        self.client = get_anthropic_client()
 
         # Get user info
         self.user = self.db.get_user(user_id)
@@ -105,6 +107,104 @@ class WellnessCompanionAgent:
             # Get AI response using direct implementation
             response_text, stress_level = self._get_ai_response(user_message)
 
+        return self._record_response(user_message, response_text, stress_level)
+
+    def chat_stream(self, user_message: str) -> Iterator[str]:
+        """Process user message and yield the response text as it arrives.
+
+        Only the direct Claude path streams token by token; Railtracks and
+        rule-based replies are yielded in one piece.
+
+        Args:
+            user_message: User's message
+
+        Yields:
+            Chunks of the response text
+        """
+        if not self.client or RAILTRACKS_ENABLED:
+            yield self.chat(user_message)['response']
+            return
+
+        # Save user message
+        self.db.save_conversation(
+            user_id=self.user_id,
+            role='user',
+            content=user_message,
+            session_id=self.session_id
+        )
+
+        chunks = []
+        try:
+            system_prompt, messages = self._build_ai_request(user_message)
+            with self.client.messages.stream(
+                model=settings.CLAUDE_MODEL,
+                max_tokens=settings.MAX_TOKENS,
+                temperature=settings.TEMPERATURE,
+                system=system_prompt,
+                messages=messages
+            ) as stream:
+                for text in stream.text_stream:
+                    chunks.append(text)
+                    yield text
+            response_text = ''.join(chunks)
+            stress_level = self._detect_stress_level(user_message, response_text)
+        except GeneratorExit:
+            # Closed early (e.g. the client disconnected); the stream is
+            # closed by now, so keep the part of the reply already sent
+            if chunks:
+                self._record_response(user_message, ''.join(chunks), None)
+            raise
+        except Exception as e:
+            print(f"Error streaming AI response: {e}")
+            if chunks:
+                # Keep the partial reply the user has already seen
+                response_text = ''.join(chunks)
+            else:
+                response_text = self._simple_response(user_message)
+                yield response_text
+            stress_level = None
+
+        self._record_response(user_message, response_text, stress_level)
+
+    async def achat_stream(self, user_message: str) -> AsyncIterator[str]:
+        """Async version of chat_stream for use on an event loop.
+
+        The blocking API and database calls run in a worker thread, one
+        chunk at a time, so the loop stays free while the reply streams.
+        If the caller stops early (or is cancelled), the API stream is
+        closed and the partial reply saved.
+
+        Args:
+            user_message: User's message
+
+        Yields:
+            Chunks of the response text
+        """
+        chunks = self.chat_stream(user_message)
+        # A cancelled task leaves its last next() running in the thread, and
+        # the generator can only be closed once that has returned
+        lock = threading.Lock()
+
+        def advance() -> Optional[str]:
+            with lock:
+                return next(chunks, None)
+
+        def close():
+            with lock:
+                chunks.close()
+
+        try:
+            while True:
+                chunk = await asyncio.to_thread(advance)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await asyncio.to_thread(close)
+
+    def _record_response(self, user_message: str, response_text: str,
+                         stress_level: Optional[int]) -> Dict[str, Any]:
+        """Save the assistant response and log the chat activity."""
         # Save assistant response
         self.db.save_conversation(
             user_id=self.user_id,
@@ -136,41 +236,7 @@ class WellnessCompanionAgent:
             Tuple of (response_text, stress_level)
         """
         try:
-            # Get conversation history for context
-            history = self.db.get_conversation_history(
-                user_id=self.user_id,
-                limit=settings.MAX_CONVERSATION_HISTORY,
-                session_id=self.session_id
-            )
-
-            # Build conversation context
-            messages = []
-            for msg in reversed(history):  # Reverse to get chronological order
-                messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
-
-            # Add current message
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
-
-            # Get user stats for context
-            stats = self.db.get_user_stats(self.user_id, days=7)
-            pet = self.db.get_pet(self.user_id)
-
-            # Build system prompt with context
-            system_prompt = f"""{prompts.WELLNESS_COMPANION_PROMPT}
-
-Current user context:
-- Total breaks this week: {stats['breaks']}
-- Total stretches this week: {stats['stretches']}
-- Current streak: {self.user.current_streak if self.user else 0} days
-- Pet health: {pet.health if pet else 'N/A'}
-- Pet happiness: {pet.happiness if pet else 'N/A'}
-"""
+            system_prompt, messages = self._build_ai_request(user_message)
 
             # Call Claude API
             response = self.client.messages.create(
@@ -192,6 +258,49 @@ Current user context:
             print(f"Error getting AI response: {e}")
             return self._simple_response(user_message), None
 
+    def _build_ai_request(self, user_message: str) -> tuple[str, List[Dict[str, str]]]:
+        """Build the system prompt and message list for a Claude request.
+
+        Returns:
+            Tuple of (system_prompt, messages)
+        """
+        # Get conversation history for context
+        history = self.db.get_conversation_history(
+            user_id=self.user_id,
+            limit=settings.MAX_CONVERSATION_HISTORY,
+            session_id=self.session_id
+        )
+
+        # Build conversation context
+        messages = []
+        for msg in reversed(history):  # Reverse to get chronological order
+            messages.append({
+                "role": msg.role,
+                "content": msg.content
+            })
+
+        # Add current message
+        messages.append({
+            "role": "user",
+            "content": user_message
+        })
+
+        # Get user stats for context
+        stats = self.db.get_user_stats(self.user_id, days=7)
+        pet = self.db.get_pet(self.user_id)
+
+        # Build system prompt with context
+        system_prompt = f"""{prompts.WELLNESS_COMPANION_PROMPT}
+
+Current user context:
+- Total breaks this week: {stats['breaks']}
+- Total stretches this week: {stats['stretches']}
+- Current streak: {self.user.current_streak if self.user else 0} days
+- Pet health: {pet.health if pet else 'N/A'}
+- Pet happiness: {pet.happiness if pet else 'N/A'}
+"""
+        return system_prompt, messages
+
     def _simple_response(self, user_message: str) -> str:
         """Simple rule-based response when API is not available."""
         message_lower = user_message.lower()
@@ -314,9 +423,10 @@ Provide a brief, encouraging insight about their wellness journey and suggest on
             session_id=self.session_id
         )
 
+        # Rows come straight from our own table, so skip re-validation
         messages = []
         for msg in reversed(history):
-            messages.append(ConversationMessage(
+            messages.append(ConversationMessage.model_construct(
                 role=msg.role,
                 content=msg.content
             ))
@@ -70,6 +70,22 @@ VISION_MAX_TOKENS = 1024
 # Stretch Verification Settings
 MIN_VERIFICATION_CONFIDENCE = 0.6  # Minimum confidence to accept stretch verification
 
+# Pose Detection Settings
+# MediaPipe model: 0 = Lite (fastest), 1 = Full, 2 = Heavy (most accurate)
+POSE_MODEL_COMPLEXITY = int(os.getenv("POSE_MODEL_COMPLEXITY", "0"))
+# Longest side (pixels) camera frames are downscaled to before pose detection
+POSE_INFERENCE_SIZE = int(os.getenv("POSE_INFERENCE_SIZE", "640"))
+# ONNX pose landmark model to use instead of MediaPipe (needs onnxruntime)
+ONNX_POSE_PATH = os.getenv("ONNX_POSE_PATH", "")
+# Threads per ONNX pose detector (one detector per session)
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))
+# Blend the feedback overlay on the GPU through OpenCL (if OpenCV has it)
+POSE_USE_OPENCL = os.getenv("POSE_USE_OPENCL", "false").lower() == "true"
+# Analyze camera frames in a worker process per session, off the app's GIL
+POSE_WORKER_PROCESS = os.getenv("POSE_WORKER_PROCESS", "false").lower() == "true"
+# Most pose worker processes at once; later sessions analyze in-process
+POSE_MAX_WORKERS = int(os.getenv("POSE_MAX_WORKERS", "2"))
+
 # Pet Settings
 PET_HEALTH_DECAY_RATE = 5  # Health points lost per day without activity
 PET_HAPPINESS_DECAY_RATE = 3  # Happiness points lost per day without activity
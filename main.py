@@ -2,13 +2,13 @@
 """Main entry point for the Burnout & Office Syndrome Prevention App."""
 import sys
 import argparse
+import logging
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import settings
-from ui.app import create_app
 
 
 def main():
@@ -43,6 +43,11 @@ def main():
 
     args = parser.parse_args()
 
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else settings.LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
     # Print welcome message
     print("=" * 60)
     print("🌟 Burnout & Office Syndrome Prevention App")
@@ -60,14 +65,17 @@ def main():
     print("Ready! Open your browser to start your wellness journey! 🚀")
     print("=" * 60)
 
-    # Create and launch the app
+    # Create and launch the app. Imported here rather than at the top so
+    # pose worker processes, which re-import this module, skip Gradio.
+    from ui.app import create_app
     try:
         app = create_app()
         app.launch(
             server_name=args.host,
             server_port=args.port,
             share=args.share,
-            debug=args.debug
+            debug=args.debug,
+            max_threads=16
         )
     except KeyboardInterrupt:
         print("\n\nShutting down gracefully... 👋")
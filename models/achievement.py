@@ -1,5 +1,5 @@
 """Achievement model for gamification system."""
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from datetime import datetime
 
 from models.base import Base
@@ -18,6 +18,7 @@ class Achievement(Base):
     points_reward = Column(Integer, default=0)
     requirement_type = Column(String(50), nullable=False)  # 'streak', 'total_count', 'special'
     requirement_value = Column(Integer, nullable=False)
+    requirement_category = Column(String(50), nullable=True)  # 'stretches', 'breaks', 'points', 'any', ...
     tier = Column(String(20), default='bronze')  # bronze, silver, gold, platinum
 
     def __repr__(self):
@@ -34,6 +35,7 @@ class Achievement(Base):
             'points_reward': self.points_reward,
             'requirement_type': self.requirement_type,
             'requirement_value': self.requirement_value,
+            'requirement_category': self.requirement_category,
             'tier': self.tier
         }
 
@@ -42,6 +44,9 @@ class UserAchievement(Base):
     """Track which achievements users have unlocked."""
 
     __tablename__ = 'user_achievements'
+    __table_args__ = (
+        Index('ix_user_achievement_user', 'user_id'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -1,5 +1,5 @@
 """Activity model for logging user activities (breaks, stretches, chats)."""
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float, Index
 from datetime import datetime
 
 from models.base import Base
@@ -9,6 +9,10 @@ class Activity(Base):
     """Activity log for tracking all user actions."""
 
     __tablename__ = 'activities'
+    __table_args__ = (
+        # Per-user history, newest first (streaks, stats, activity lists)
+        Index('ix_activity_user_ts', 'user_id', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -60,6 +64,9 @@ class ConversationHistory(Base):
     """Store conversation history with AI companion."""
 
     __tablename__ = 'conversation_history'
+    __table_args__ = (
+        Index('ix_conv_user_session_ts', 'user_id', 'session_id', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
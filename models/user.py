@@ -1,5 +1,5 @@
 """User model for storing user profiles and preferences."""
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, JSON
 from datetime import datetime
 
 from models.base import Base
@@ -33,6 +33,7 @@ class User(Base):
     total_points = Column(Integer, default=0)
     current_streak = Column(Integer, default=0)
     longest_streak = Column(Integer, default=0)
+    last_streak_date = Column(Date, nullable=True)  # Last day counted towards the streak
 
     # Pet preferences
     pet_name = Column(String(50), default='Buddy')
@@ -61,6 +62,7 @@ class User(Base):
             'total_points': self.total_points,
             'current_streak': self.current_streak,
             'longest_streak': self.longest_streak,
+            'last_streak_date': self.last_streak_date.isoformat() if self.last_streak_date else None,
             'pet_name': self.pet_name,
             'pet_type': self.pet_type
         }
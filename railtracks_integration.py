@@ -32,13 +32,16 @@ except ImportError:
     rt = MockRailtracks()
 
 
+import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from anthropic import Anthropic
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from config import settings, prompts
 from tools.database_tools import get_db
+from tools.llm_client import get_anthropic_client
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
@@ -47,6 +50,8 @@ from tools.database_tools import get_db
 
 class CalendarEvent(BaseModel):
     """Calendar event model for Railtracks compatibility."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     title: str
     start_time: str
     end_time: str
@@ -55,12 +60,16 @@ class CalendarEvent(BaseModel):
 
 class BreakRecord(BaseModel):
     """Break history record for Railtracks compatibility."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     timestamp: str
     duration: int  # minutes
 
 
 class ConversationMessage(BaseModel):
     """Conversation message model for Railtracks compatibility."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     role: str
     content: str
 
@@ -81,6 +90,8 @@ class ActivityMetadata(BaseModel):
 
 class RecentActivity(BaseModel):
     """Recent activity data for Railtracks compatibility."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     breaks_today: int = 0
     stretches_today: int = 0
     last_activity: str = "Unknown"
@@ -149,6 +160,12 @@ class BreakSchedule(BaseModel):
 # RAILTRACKS FUNCTION NODES - Individual AI-powered functions
 # ============================================================================
 
+# Phrases used to bucket Claude's free-text stress analysis
+_HIGH_STRESS_MARKERS = ('high stress', 'very stressed')
+_MODERATE_STRESS_MARKERS = ('moderate stress',)
+_LOW_STRESS_MARKERS = ('low stress',)
+
+
 @rt.function_node
 def analyze_work_pattern(calendar_events: List[CalendarEvent], past_breaks: List[BreakRecord]) -> AnalysisResult:
     """
@@ -172,7 +189,7 @@ def analyze_work_pattern(calendar_events: List[CalendarEvent], past_breaks: List
         )
 
     try:
-        client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        client = get_anthropic_client()
 
         # Convert Pydantic models to dict for prompt
         events_data = [event.model_dump() for event in calendar_events]
@@ -211,7 +228,7 @@ Return as JSON."""
         )
 
     except Exception as e:
-        print(f"Error in analyze_work_pattern: {e}")
+        logger.exception("Error in analyze_work_pattern")
         return AnalysisResult(
             next_break_in_minutes=45,
             reasoning=f'Error occurred: {str(e)}',
@@ -242,7 +259,7 @@ def detect_stress_level(conversation_history: List[ConversationMessage], recent_
         )
 
     try:
-        client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        client = get_anthropic_client()
 
         # Build analysis prompt
         messages_text = "\n".join([
@@ -279,12 +296,13 @@ Be empathetic and actionable."""
         analysis_text = response.content[0].text
 
         # Simple parsing (would use structured output in production)
+        lowered = analysis_text.casefold()
         stress_level = 5  # default
-        if 'high stress' in analysis_text.lower() or 'very stressed' in analysis_text.lower():
+        if any(marker in lowered for marker in _HIGH_STRESS_MARKERS):
             stress_level = 8
-        elif 'moderate stress' in analysis_text.lower():
+        elif any(marker in lowered for marker in _MODERATE_STRESS_MARKERS):
             stress_level = 6
-        elif 'low stress' in analysis_text.lower():
+        elif any(marker in lowered for marker in _LOW_STRESS_MARKERS):
             stress_level = 3
 
         return StressAnalysisResult(
@@ -295,7 +313,7 @@ Be empathetic and actionable."""
         )
 
     except Exception as e:
-        print(f"Error in detect_stress_level: {e}")
+        logger.exception("Error in detect_stress_level")
         return StressAnalysisResult(
             stress_level=5,
             indicators=[f'Error: {str(e)}'],
@@ -318,62 +336,22 @@ def generate_personalized_routine(user_pain_points: List[str], fitness_level: st
     Returns:
         List of recommended stretches with instructions
     """
-    if not settings.ANTHROPIC_API_KEY:
-        return [
-            StretchRecommendation(
-                stretch_id='neck_side_stretch',
-                name='Neck Side Stretch',
-                reasoning='Default recommendation'
-            )
-        ]
-
-    try:
-        client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-
-        prompt = f"""Create a personalized stretch routine:
-
-User Profile:
-- Pain points: {', '.join(user_pain_points)}
-- Fitness level: {fitness_level}
-
-Requirements:
-- 5-7 stretches
-- Office-friendly (no equipment needed)
-- Progressive difficulty
-- Target specific pain points
-- Include warmup and cooldown
-
-Provide scientific reasoning for each selection."""
-
-        response = client.messages.create(
-            model=settings.CLAUDE_MODEL,
-            max_tokens=1000,
-            temperature=0.7,
-            system="You are a physical therapist specializing in office ergonomics.",
-            messages=[{"role": "user", "content": prompt}]
+    # Claude's free-text routine was never parsed into the recommendations,
+    # so skip the API round-trip until structured output is wired up.
+    return [
+        StretchRecommendation(
+            stretch_id='neck_rotation',
+            name='Gentle Neck Rotation',
+            duration=30,
+            reasoning='Loosens neck muscles stiffened by screen work'
+        ),
+        StretchRecommendation(
+            stretch_id='shoulder_rolls',
+            name='Shoulder Rolls',
+            duration=30,
+            reasoning='Relieves upper back tension'
         )
-
-        routine_text = response.content[0].text
-
-        # Return structured routine (simplified)
-        return [
-            StretchRecommendation(
-                stretch_id='neck_rotation',
-                name='Gentle Neck Rotation',
-                duration=30,
-                reasoning=routine_text
-            ),
-            StretchRecommendation(
-                stretch_id='shoulder_rolls',
-                name='Shoulder Rolls',
-                duration=30,
-                reasoning='Relieves upper back tension'
-            )
-        ]
-
-    except Exception as e:
-        print(f"Error in generate_personalized_routine: {e}")
-        return []
+    ]
 
 
 @rt.function_node
@@ -434,7 +412,7 @@ def wellness_companion_agent(
         )
 
     try:
-        client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        client = get_anthropic_client()
         db = get_db()
 
         # Get user context
@@ -496,7 +474,7 @@ You have access to the user's wellness data. Be encouraging, specific, and actio
         )
 
     except Exception as e:
-        print(f"Error in wellness_companion_agent: {e}")
+        logger.exception("Error in wellness_companion_agent")
         return WellnessResponse(
             response=f'I\'m experiencing technical difficulties: {str(e)}',
             stress_level=None,
@@ -631,8 +609,8 @@ def send_break_notification(message: str, urgency: str = "normal") -> bool:
             app_name="Burnout Prevention"
         )
         return True
-    except Exception as e:
-        print(f"Error sending notification: {e}")
+    except Exception:
+        logger.exception("Error sending notification")
         return False
 
 
@@ -655,16 +633,19 @@ def log_wellness_activity(
     """
     try:
         db = get_db()
-        # Convert Pydantic model to dict if provided
-        metadata_dict = metadata.model_dump() if metadata else {}
-        db.log_activity(
-            user_id=user_id,
-            activity_type=activity_type,
-            **metadata_dict
-        )
+        if metadata is None:
+            db.log_activity(user_id=user_id, activity_type=activity_type)
+        else:
+            # Activity has no details/category columns, so keep them in extra_data
+            db.log_activity(
+                user_id=user_id,
+                activity_type=activity_type,
+                duration=metadata.duration,
+                extra_data={'details': metadata.details, 'category': metadata.category}
+            )
         return True
-    except Exception as e:
-        print(f"Error logging activity: {e}")
+    except Exception:
+        logger.exception("Error logging activity")
         return False
 
 
@@ -0,0 +1,92 @@
+"""Tests for activity logging in tools.database_tools."""
+import threading
+
+import pytest
+
+from models.achievement import Achievement, UserAchievement
+from models.activity import Activity
+from tools.database_tools import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh database with the achievement catalog seeded."""
+    database = Database(f"sqlite:///{tmp_path / 'wellness.db'}")
+    yield database
+    database.engine.dispose()
+
+
+def _activities(db, user_id):
+    with db.session_scope() as session:
+        return session.query(Activity).filter(Activity.user_id == user_id).all()
+
+
+def _achievement_points(db, user_id):
+    with db.session_scope() as session:
+        return sum(
+            achievement.points_reward
+            for achievement in session.query(Achievement)
+            .join(UserAchievement, UserAchievement.achievement_id == Achievement.id)
+            .filter(UserAchievement.user_id == user_id)
+        )
+
+
+def test_different_stretches_are_not_duplicates(db):
+    user = db.create_user('alice')
+    for name in ('Neck Roll', 'Shoulder Shrug', 'Wrist Stretch'):
+        assert db.log_activity(user.id, 'stretch', stretch_name=name,
+                               duration=30, points_earned=20) is not None
+
+    assert db.get_user(user.id).total_stretches_completed == 3
+    assert len(_activities(db, user.id)) == 3
+
+
+def test_duplicate_is_not_saved_and_totals_match(db):
+    user = db.create_user('bob')
+    first = db.log_activity(user.id, 'break', duration=300, points_earned=10)
+    repeat = db.log_activity(user.id, 'break', duration=300, points_earned=10)
+    db.log_activity(user.id, 'stretch', stretch_name='Neck Roll', points_earned=20)
+
+    assert first is not None and first.id is not None
+    assert repeat is None
+
+    activities = _activities(db, user.id)
+    user = db.get_user(user.id)
+    assert len(activities) == 2
+    assert user.total_breaks_taken == 1
+    assert user.total_stretches_completed == 1
+    assert user.total_points == (
+        sum(activity.points_earned for activity in activities)
+        + _achievement_points(db, user.id)
+    )
+
+
+def test_duplicate_window_slides(db, monkeypatch):
+    user = db.create_user('carol')
+    clock = iter([100.0, 109.0, 120.0])
+    monkeypatch.setattr('tools.database_tools.time.monotonic', lambda: next(clock))
+
+    assert db.log_activity(user.id, 'break', duration=60) is not None
+    # 9 s later, even if a fixed 10 s bucket boundary was crossed
+    assert db.log_activity(user.id, 'break', duration=60) is None
+    assert db.log_activity(user.id, 'break', duration=60) is not None
+
+
+def test_concurrent_repeats_log_once(db):
+    user = db.create_user('dave')
+    results = []
+    barrier = threading.Barrier(4)
+
+    def log():
+        barrier.wait()
+        results.append(db.log_activity(user.id, 'break', duration=120, points_earned=10))
+        db.SessionLocal.remove()
+
+    threads = [threading.Thread(target=log) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(result is not None for result in results) == 1
+    assert db.get_user(user.id).total_breaks_taken == 1
@@ -1,10 +1,12 @@
 """Tools for the Burnout Prevention App."""
 from tools.database_tools import get_db, Database
 from tools.notification_tools import get_notification_manager, NotificationManager
+from tools.llm_client import get_anthropic_client
 
 __all__ = [
     'get_db',
     'Database',
     'get_notification_manager',
     'NotificationManager',
+    'get_anthropic_client',
 ]
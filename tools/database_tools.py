@@ -1,9 +1,17 @@
 """Database tools for data persistence and retrieval."""
+import functools
 import json
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
-from sqlalchemy import create_engine, func, and_, or_
-from sqlalchemy.orm import sessionmaker, Session
+from typing import Optional, List, Dict, Any, Iterator
+from sqlalchemy import (
+    create_engine, event, func, and_, or_, case, insert, inspect, select, text, bindparam, Row
+)
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
 from pathlib import Path
 
 from config import settings
@@ -14,145 +22,339 @@ from models.achievement import Achievement, UserAchievement
 from models.pet import Pet
 
 
+# Hot lookups built once so every call reuses the same statement object
+# (and SQL text), hitting SQLAlchemy's compiled cache and sqlite3's
+# prepared statement cache instead of rebuilding the query each time.
+_USER_BY_ID = select(User).where(User.id == bindparam('user_id'))
+_USER_BY_USERNAME = select(User).where(User.username == bindparam('username'))
+_PET_BY_USER = select(Pet).where(Pet.user_id == bindparam('user_id'))
+_UNLOCKED_IDS = select(UserAchievement.achievement_id)\
+    .where(UserAchievement.user_id == bindparam('user_id'))
+
+class _LRUCache:
+    """Small thread-safe LRU map with targeted invalidation."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def claim(self, key, now: float, ttl: float) -> bool:
+        """Store now for key unless key was stored less than ttl ago.
+
+        Returns:
+            True if key was claimed, False if it is still fresh
+        """
+        with self._lock:
+            seen = self._data.get(key)
+            if seen is not None and now - seen < ttl:
+                return False
+            self._data[key] = now
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection for a small, write-heavy app.
+
+    WAL with synchronous=NORMAL avoids an fsync on every commit while
+    staying safe against application crashes.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.close()
+
+
 class Database:
     """Main database interface."""
 
+    # Identical activities within this many seconds are logged only once
+    DUPLICATE_WINDOW_SECONDS = 10
+
+    # User counter that each (requirement_type, requirement_category) bucket
+    # of achievements is measured against
+    _ACHIEVEMENT_PROGRESS = {
+        ('total_count', 'stretches'): 'total_stretches_completed',
+        ('total_count', 'breaks'): 'total_breaks_taken',
+        ('total_count', 'points'): 'total_points',
+        ('streak', 'any'): 'current_streak',
+    }
+
     def __init__(self, database_url: str = None):
         """Initialize database connection."""
         self.database_url = database_url or settings.DATABASE_URL
-        self.engine = create_engine(self.database_url)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.engine = create_engine(self.database_url, pool_pre_ping=True)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
+        # One reusable session per thread. Loaded attributes are kept after
+        # commit so returned objects stay usable once the session is closed.
+        self.SessionLocal = scoped_session(
+            sessionmaker(bind=self.engine, expire_on_commit=False)
+        )
+
+        # Read-mostly lookups, invalidated by the methods that write them
+        self._user_cache = _LRUCache()
+        self._username_cache = _LRUCache()  # username -> user id
+        self._pet_cache = _LRUCache()
+        self._unlocked_cache = _LRUCache()  # user id -> unlocked achievement ids
+        self._recent_activity = _LRUCache(maxsize=1024)  # (user id, type, details) -> last logged
+        self._achievements_cache = None
+        self._achievement_buckets = None
 
         # Create all tables
         self._create_tables()
 
-        # Initialize achievements from JSON
+        # Initialize achievements from JSON before any activity can be
+        # logged, so the catalog is never read half-seeded
         self._initialize_achievements()
 
     def _create_tables(self):
         """Create all database tables."""
         Base.metadata.create_all(self.engine)
+        self._upgrade_existing_tables()
+
+        if self.engine.dialect.name == 'sqlite':
+            # Refresh planner statistics so the new indexes get used
+            with self.engine.begin() as conn:
+                conn.execute(text("PRAGMA optimize"))
+
+    def _upgrade_existing_tables(self):
+        """Add columns and indexes introduced after a table was first created.
+
+        create_all() never alters existing tables, so databases created by an
+        older version are patched with ALTER TABLE ADD COLUMN and
+        CREATE INDEX.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        conn.execute(text(
+                            f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                        ))
+
+                existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        index.create(conn)
 
     def get_session(self) -> Session:
-        """Get a new database session."""
+        """Get the current thread's database session."""
         return self.SessionLocal()
 
-    def _initialize_achievements(self):
-        """Load achievements from JSON file into database."""
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """Provide a transactional scope around a series of operations.
+
+        Commits once when the block exits, rolls back on error and always
+        closes the session. Closing releases the connection but keeps the
+        thread's Session object for reuse, so scopes must not be nested.
+        """
         session = self.get_session()
         try:
-            # Check if achievements already exist
-            if session.query(Achievement).count() > 0:
-                return
-
-            # Load achievements from JSON
-            achievements_file = settings.DATA_DIR / "achievements.json"
-            if not achievements_file.exists():
-                print(f"Warning: {achievements_file} not found")
-                return
-
-            with open(achievements_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # Insert achievements
-            for ach_data in data.get('achievements', []):
-                achievement = Achievement(
-                    achievement_key=ach_data['achievement_key'],
-                    name=ach_data['name'],
-                    description=ach_data['description'],
-                    icon=ach_data['icon'],
-                    points_reward=ach_data['points_reward'],
-                    requirement_type=ach_data['requirement_type'],
-                    requirement_value=ach_data['requirement_value'],
-                    tier=ach_data['tier']
-                )
-                session.add(achievement)
-
+            yield session
             session.commit()
-            print(f"Initialized {len(data.get('achievements', []))} achievements")
-
-        except Exception as e:
-            print(f"Error initializing achievements: {e}")
+        except Exception:
             session.rollback()
+            raise
         finally:
             session.close()
 
+    def _initialize_achievements(self):
+        """Load achievements from JSON file into database."""
+        try:
+            with self.session_scope() as session:
+                # Check if achievements already exist
+                existing = session.query(Achievement).count()
+                missing_category = session.query(Achievement)\
+                    .filter(Achievement.requirement_category.is_(None))\
+                    .count()
+                if existing > 0 and missing_category == 0:
+                    return
+
+                # Load achievements from JSON
+                achievements_file = settings.DATA_DIR / "achievements.json"
+                if not achievements_file.exists():
+                    print(f"Warning: {achievements_file} not found")
+                    return
+
+                with open(achievements_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                if existing > 0:
+                    # Backfill categories for databases seeded before the column existed
+                    for ach_data in data.get('achievements', []):
+                        session.query(Achievement)\
+                            .filter(Achievement.achievement_key == ach_data['achievement_key'])\
+                            .update({'requirement_category': ach_data.get('requirement_category')})
+                    return
+
+                # Insert achievements in a single executemany
+                rows = [
+                    {
+                        'achievement_key': ach_data['achievement_key'],
+                        'name': ach_data['name'],
+                        'description': ach_data['description'],
+                        'icon': ach_data['icon'],
+                        'points_reward': ach_data['points_reward'],
+                        'requirement_type': ach_data['requirement_type'],
+                        'requirement_value': ach_data['requirement_value'],
+                        'requirement_category': ach_data.get('requirement_category'),
+                        'tier': ach_data['tier']
+                    }
+                    for ach_data in data.get('achievements', [])
+                ]
+                if rows:
+                    session.execute(insert(Achievement), rows)
+
+            print(f"Initialized {len(rows)} achievements")
+
+        except Exception as e:
+            print(f"Error initializing achievements: {e}")
+
     # User operations
     def create_user(self, username: str, email: str = None, **kwargs) -> User:
         """Create a new user."""
-        session = self.get_session()
-        try:
+        with self.session_scope() as session:
             user = User(username=username, email=email, **kwargs)
             session.add(user)
-            session.commit()
-            session.refresh(user)
+            session.flush()
 
-            # Create pet for user
-            self.create_pet(user.id, name=kwargs.get('pet_name', 'Buddy'))
+            # Create pet for user in the same transaction
+            session.add(Pet(user_id=user.id, name=kwargs.get('pet_name', 'Buddy')))
 
             return user
-        finally:
-            session.close()
 
     def get_user(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        session = self.get_session()
-        try:
-            return session.query(User).filter(User.id == user_id).first()
-        finally:
-            session.close()
+        user = self._user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        with self.session_scope() as session:
+            user = session.execute(_USER_BY_ID, {'user_id': user_id}).scalar_one_or_none()
+
+        if user is not None:
+            self._user_cache.put(user_id, user)
+        return user
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username."""
-        session = self.get_session()
-        try:
-            return session.query(User).filter(User.username == username).first()
-        finally:
-            session.close()
+        user_id = self._username_cache.get(username)
+        if user_id is not None:
+            return self.get_user(user_id)
+
+        with self.session_scope() as session:
+            user = session.execute(_USER_BY_USERNAME, {'username': username}).scalar_one_or_none()
+
+        if user is not None:
+            self._username_cache.put(username, user.id)
+            self._user_cache.put(user.id, user)
+        return user
 
     def update_user(self, user_id: int, **kwargs) -> Optional[User]:
         """Update user attributes."""
-        session = self.get_session()
-        try:
-            user = session.query(User).filter(User.id == user_id).first()
+        with self.session_scope() as session:
+            user = session.execute(_USER_BY_ID, {'user_id': user_id}).scalar_one_or_none()
             if user:
                 for key, value in kwargs.items():
                     if hasattr(user, key):
                         setattr(user, key, value)
                 user.last_active = datetime.utcnow()
-                session.commit()
-                session.refresh(user)
-            return user
-        finally:
-            session.close()
-
-    # Activity operations
-    def log_activity(self, user_id: int, activity_type: str, **kwargs) -> Activity:
-        """Log a user activity."""
-        session = self.get_session()
-        try:
-            activity = Activity(
-                user_id=user_id,
-                activity_type=activity_type,
-                **kwargs
-            )
-            session.add(activity)
-            session.commit()
-            session.refresh(activity)
 
-            # Update user stats
-            self._update_user_stats(session, user_id, activity_type, kwargs.get('points_earned', 0))
+        self._invalidate_user(user_id, username_changed='username' in kwargs)
+        return user
 
-            # Check for achievements
-            self._check_achievements(session, user_id)
+    def _invalidate_user(self, user_id: int, username_changed: bool = False):
+        """Drop a user from the lookup caches after a write."""
+        self._user_cache.pop(user_id)
+        if username_changed:
+            self._username_cache.clear()
 
-            return activity
-        finally:
-            session.close()
+    # Activity operations
+    def log_activity(self, user_id: int, activity_type: str, **kwargs) -> Optional[Activity]:
+        """Log a user activity.
+
+        Repeats of the same activity with the same details within
+        DUPLICATE_WINDOW_SECONDS of the last one logged (double clicks,
+        retries) are not recorded again, so the activity rows always add up
+        to the user's stats.
+
+        Returns:
+            The saved activity, or None if it was a duplicate
+        """
+        # Claimed before the write, so concurrent repeats cannot both pass
+        recent_key = (user_id, activity_type, repr(sorted(kwargs.items())))
+        if not self._recent_activity.claim(recent_key, time.monotonic(),
+                                           self.DUPLICATE_WINDOW_SECONDS):
+            return None
+
+        # One timestamp for the activity row and everything it updates
+        now = datetime.utcnow()
+        kwargs.setdefault('timestamp', now)
 
-    def _update_user_stats(self, session: Session, user_id: int, activity_type: str, points: int):
+        try:
+            with self.session_scope() as session:
+                activity = Activity(
+                    user_id=user_id,
+                    activity_type=activity_type,
+                    **kwargs
+                )
+                session.add(activity)
+
+                # Stats, streak and achievements share this transaction and
+                # are committed together when the scope exits
+                self._update_user_stats(session, user_id, activity_type,
+                                        kwargs.get('points_earned', 0), now)
+
+                # Check for achievements
+                unlocked = self._check_achievements(session, user_id)
+        except Exception:
+            # Nothing was saved, so a retry must not count as a duplicate
+            self._recent_activity.pop(recent_key)
+            raise
+
+        self._invalidate_user(user_id)
+        if unlocked:
+            self._unlocked_cache.pop(user_id)
+        return activity
+
+    def _update_user_stats(self, session: Session, user_id: int, activity_type: str, points: int,
+                           now: datetime = None):
         """Update user statistics based on activity."""
-        user = session.query(User).filter(User.id == user_id).first()
+        now = now or datetime.utcnow()
+        user = session.execute(_USER_BY_ID, {'user_id': user_id}).scalar_one_or_none()
         if not user:
             return
 
@@ -162,29 +364,30 @@ class Database:
             user.total_stretches_completed += 1
 
         user.total_points += points
-        user.last_active = datetime.utcnow()
+        user.last_active = now
 
         # Update streak
-        self._update_streak(session, user)
-
-        session.commit()
+        self._update_streak(session, user, now)
 
-    def _update_streak(self, session: Session, user: User):
+    def _update_streak(self, session: Session, user: User, now: datetime = None):
         """Update user's activity streak."""
-        today = datetime.utcnow().date()
-
-        # Get last activity date (excluding today)
-        last_activity = session.query(Activity)\
-            .filter(Activity.user_id == user.id)\
-            .filter(func.date(Activity.timestamp) < today)\
-            .order_by(Activity.timestamp.desc())\
-            .first()
-
-        if not last_activity:
+        today = (now or datetime.utcnow()).date()
+
+        last_date = user.last_streak_date
+        if last_date is None:
+            # Users from before last_streak_date existed: fall back to their
+            # last activity before today, once
+            last_activity = session.query(Activity.timestamp)\
+                .filter(Activity.user_id == user.id)\
+                .filter(func.date(Activity.timestamp) < today)\
+                .order_by(Activity.timestamp.desc())\
+                .first()
+            last_date = last_activity[0].date() if last_activity else None
+
+        if last_date is None:
             # First activity ever
             user.current_streak = 1
         else:
-            last_date = last_activity.timestamp.date()
             days_diff = (today - last_date).days
 
             if days_diff == 1:
@@ -197,75 +400,76 @@ class Database:
                 # Streak broken
                 user.current_streak = 1
 
+        user.last_streak_date = today
+
         # Update longest streak
         if user.current_streak > user.longest_streak:
             user.longest_streak = user.current_streak
 
     def get_activities(self, user_id: int, activity_type: str = None,
-                      limit: int = 50, days: int = None) -> List[Activity]:
-        """Get user activities with optional filters."""
-        session = self.get_session()
-        try:
-            query = session.query(Activity).filter(Activity.user_id == user_id)
+                      limit: int = 50, days: int = None) -> List[Row]:
+        """Get user activities with optional filters.
+
+        Rows are read through Core and expose the activity columns as
+        attributes, so callers read them like Activity objects.
+        """
+        activities = Activity.__table__
+        with self.session_scope() as session:
+            query = select(activities).where(activities.c.user_id == user_id)
 
             if activity_type:
-                query = query.filter(Activity.activity_type == activity_type)
+                query = query.where(activities.c.activity_type == activity_type)
 
             if days:
                 since_date = datetime.utcnow() - timedelta(days=days)
-                query = query.filter(Activity.timestamp >= since_date)
+                query = query.where(activities.c.timestamp >= since_date)
 
-            return query.order_by(Activity.timestamp.desc()).limit(limit).all()
-        finally:
-            session.close()
+            query = query.order_by(activities.c.timestamp.desc()).limit(limit)
+            return session.execute(query).all()
 
     # Pet operations
     def create_pet(self, user_id: int, name: str = 'Buddy',
                    personality_type: str = 'encouraging_coach') -> Pet:
         """Create a pet for a user."""
-        session = self.get_session()
-        try:
+        with self.session_scope() as session:
             pet = Pet(
                 user_id=user_id,
                 name=name,
                 personality_type=personality_type
             )
             session.add(pet)
-            session.commit()
-            session.refresh(pet)
             return pet
-        finally:
-            session.close()
 
     def get_pet(self, user_id: int) -> Optional[Pet]:
         """Get user's pet."""
-        session = self.get_session()
-        try:
-            return session.query(Pet).filter(Pet.user_id == user_id).first()
-        finally:
-            session.close()
+        pet = self._pet_cache.get(user_id)
+        if pet is not None:
+            return pet
+
+        with self.session_scope() as session:
+            pet = session.execute(_PET_BY_USER, {'user_id': user_id}).scalars().first()
+
+        if pet is not None:
+            self._pet_cache.put(user_id, pet)
+        return pet
 
     def update_pet(self, user_id: int, **kwargs) -> Optional[Pet]:
         """Update pet attributes."""
-        session = self.get_session()
-        try:
-            pet = session.query(Pet).filter(Pet.user_id == user_id).first()
+        with self.session_scope() as session:
+            pet = session.execute(_PET_BY_USER, {'user_id': user_id}).scalars().first()
             if pet:
                 for key, value in kwargs.items():
                     if hasattr(pet, key):
                         setattr(pet, key, value)
-                session.commit()
-                session.refresh(pet)
-            return pet
-        finally:
-            session.close()
+
+        self._pet_cache.pop(user_id)
+        return pet
 
     def update_pet_stats(self, user_id: int, health_change: float = 0,
                         happiness_change: float = 0, exp_gain: int = 0) -> Optional[Pet]:
         """Update pet stats with activity."""
-        session = self.get_session()
-        try:
-            pet = session.query(Pet).filter(Pet.user_id == user_id).first()
+        with self.session_scope() as session:
+            pet = session.execute(_PET_BY_USER, {'user_id': user_id}).scalars().first()
             if pet:
                 pet.update_stats(health_change, happiness_change, exp_gain)
 
@@ -275,18 +479,14 @@ class Database:
                     pet.evolution_stage = new_stage
                     # TODO: Trigger evolution celebration
 
-                session.commit()
-                session.refresh(pet)
-            return pet
-        finally:
-            session.close()
+        self._pet_cache.pop(user_id)
+        return pet
 
     # Conversation history
     def save_conversation(self, user_id: int, role: str, content: str,
                          session_id: str = None, stress_indicators: List = None) -> ConversationHistory:
         """Save conversation message."""
-        session = self.get_session()
-        try:
+        with self.session_scope() as session:
             conv = ConversationHistory(
                 user_id=user_id,
                 role=role,
@@ -295,154 +495,208 @@ class Database:
                 stress_indicators=stress_indicators
             )
             session.add(conv)
-            session.commit()
-            session.refresh(conv)
             return conv
-        finally:
-            session.close()
 
     def get_conversation_history(self, user_id: int, limit: int = 50,
-                                session_id: str = None) -> List[ConversationHistory]:
-        """Get conversation history."""
-        session = self.get_session()
-        try:
-            query = session.query(ConversationHistory).filter(ConversationHistory.user_id == user_id)
+                                session_id: str = None) -> List[Row]:
+        """Get conversation history as read-only rows, newest first."""
+        history = ConversationHistory.__table__
+        with self.session_scope() as session:
+            query = select(history.c.role, history.c.content, history.c.timestamp,
+                           history.c.session_id, history.c.stress_indicators)\
+                .where(history.c.user_id == user_id)
 
             if session_id:
-                query = query.filter(ConversationHistory.session_id == session_id)
+                query = query.where(history.c.session_id == session_id)
 
-            return query.order_by(ConversationHistory.timestamp.desc()).limit(limit).all()
-        finally:
-            session.close()
+            query = query.order_by(history.c.timestamp.desc()).limit(limit)
+            return session.execute(query).all()
 
     # Achievement operations
-    def _check_achievements(self, session: Session, user_id: int):
-        """Check if user has unlocked any new achievements."""
-        user = session.query(User).filter(User.id == user_id).first()
-        if not user:
-            return
-
-        # Get all achievements
-        achievements = session.query(Achievement).all()
-
-        # Get already unlocked achievements
-        unlocked = session.query(UserAchievement.achievement_id)\
-            .filter(UserAchievement.user_id == user_id)\
-            .all()
-        unlocked_ids = {a[0] for a in unlocked}
-
-        # Check each achievement
-        for achievement in achievements:
-            if achievement.id in unlocked_ids:
-                continue
-
-            if self._check_achievement_requirement(session, user, achievement):
-                # Unlock achievement
-                user_ach = UserAchievement(
-                    user_id=user_id,
-                    achievement_id=achievement.id
-                )
-                session.add(user_ach)
+    def _check_achievements(self, session: Session, user_id: int) -> List[Achievement]:
+        """Unlock achievements whose thresholds the user has now reached.
 
-                # Award points
-                user.total_points += achievement.points_reward
+        Thresholds are bisected per requirement bucket, so only achievements
+        at or below the user's current counters are looked at.
 
+        Returns:
+            The newly unlocked achievements
+        """
+        user = session.get(User, user_id)
+        if not user:
+            return []
+
+        buckets = self._get_achievement_buckets(session)
+        unlocked_ids = set(self._get_unlocked_ids(session, user_id))
+        newly_unlocked = []
+
+        # Unlock rewards add points, which can cross further point thresholds
+        while True:
+            reached = []
+            for bucket_key, counter in self._ACHIEVEMENT_PROGRESS.items():
+                if bucket_key not in buckets:
+                    continue
+                thresholds, achievements = buckets[bucket_key]
+                count = bisect_right(thresholds, getattr(user, counter) or 0)
+                reached.extend(a for a in achievements[:count] if a.id not in unlocked_ids)
+
+            if not reached:
+                break
+
+            points = 0
+            for achievement in reached:
+                unlocked_ids.add(achievement.id)
+                points += achievement.points_reward
                 print(f"🏆 Achievement unlocked: {achievement.name}")
 
-        session.commit()
-
-    def _check_achievement_requirement(self, session: Session, user: User,
-                                      achievement: Achievement) -> bool:
-        """Check if user meets achievement requirement."""
-        req_type = achievement.requirement_type
-        req_value = achievement.requirement_value
+            # Award points
+            user.total_points += points
+            newly_unlocked.extend(reached)
 
-        if req_type == 'total_count':
-            category = achievement.requirement_category if hasattr(achievement, 'requirement_category') else None
+        if newly_unlocked:
+            # Unlock them all with a single executemany
+            session.execute(insert(UserAchievement), [
+                {'user_id': user_id, 'achievement_id': achievement.id}
+                for achievement in newly_unlocked
+            ])
 
-            if category == 'stretches':
-                return user.total_stretches_completed >= req_value
-            elif category == 'breaks':
-                return user.total_breaks_taken >= req_value
-            elif category == 'points':
-                return user.total_points >= req_value
+        return newly_unlocked
 
-        elif req_type == 'streak':
-            return user.current_streak >= req_value
-
-        return False
+    def _get_achievements(self, session: Session) -> List[Achievement]:
+        """Get the achievement catalog, which is static once seeded."""
+        if self._achievements_cache is None:
+            achievements = session.query(Achievement).all()
+            if not achievements:
+                # Not seeded (e.g. the file was missing); check again next time
+                return achievements
+            self._achievements_cache = achievements
+        return self._achievements_cache
+
+    def _get_achievement_buckets(self, session: Session) -> Dict[tuple, tuple]:
+        """Group achievements by requirement, sorted by threshold.
+
+        Returns:
+            Mapping of (requirement_type, requirement_category) to a tuple of
+            (sorted thresholds, achievements in the same order)
+        """
+        if self._achievement_buckets is None:
+            catalog = self._get_achievements(session)
+            if not catalog:
+                return {}
+
+            grouped = {}
+            for achievement in catalog:
+                if achievement.requirement_type == 'streak':
+                    # Streak achievements count any activity
+                    key = ('streak', 'any')
+                else:
+                    key = (achievement.requirement_type, achievement.requirement_category)
+                grouped.setdefault(key, []).append(achievement)
+
+            buckets = {}
+            for key, achievements in grouped.items():
+                achievements.sort(key=lambda a: a.requirement_value)
+                buckets[key] = ([a.requirement_value for a in achievements], achievements)
+            self._achievement_buckets = buckets
+        return self._achievement_buckets
+
+    def _get_unlocked_ids(self, session: Session, user_id: int) -> frozenset:
+        """Get the ids of achievements a user has already unlocked."""
+        unlocked_ids = self._unlocked_cache.get(user_id)
+        if unlocked_ids is None:
+            unlocked_ids = frozenset(
+                session.execute(_UNLOCKED_IDS, {'user_id': user_id}).scalars()
+            )
+            self._unlocked_cache.put(user_id, unlocked_ids)
+        return unlocked_ids
 
     def get_user_achievements(self, user_id: int) -> List[Dict]:
         """Get all achievements for a user with unlock status."""
-        session = self.get_session()
-        try:
-            achievements = session.query(Achievement).all()
-            unlocked = session.query(UserAchievement)\
-                .filter(UserAchievement.user_id == user_id)\
-                .all()
-
-            unlocked_dict = {ua.achievement_id: ua for ua in unlocked}
+        achievements = Achievement.__table__
+        user_achievements = UserAchievement.__table__
+        with self.session_scope() as session:
+            rows = session.execute(
+                select(achievements, user_achievements.c.unlocked_at)
+                .select_from(achievements.outerjoin(
+                    user_achievements,
+                    and_(user_achievements.c.achievement_id == achievements.c.id,
+                         user_achievements.c.user_id == user_id)
+                ))
+                .order_by(achievements.c.id)
+            ).mappings().all()
 
             result = []
-            for ach in achievements:
-                ach_dict = ach.to_dict()
-                if ach.id in unlocked_dict:
+            for row in rows:
+                ach_dict = dict(row)
+                if ach_dict['unlocked_at'] is not None:
                     ach_dict['unlocked'] = True
-                    ach_dict['unlocked_at'] = unlocked_dict[ach.id].unlocked_at
                 else:
+                    del ach_dict['unlocked_at']
                     ach_dict['unlocked'] = False
                 result.append(ach_dict)
 
             return result
-        finally:
-            session.close()
 
     # Statistics and analytics
     def get_user_stats(self, user_id: int, days: int = 7) -> Dict[str, Any]:
         """Get user statistics for a period."""
-        session = self.get_session()
-        try:
+        with self.session_scope() as session:
             since_date = datetime.utcnow() - timedelta(days=days)
 
-            activities = session.query(Activity)\
+            # One aggregate row instead of shipping every activity to Python
+            row = session.query(
+                func.count(Activity.id),
+                func.sum(case((Activity.activity_type == 'break', 1), else_=0)),
+                func.sum(case((Activity.activity_type == 'stretch', 1), else_=0)),
+                func.sum(case((Activity.activity_type == 'chat', 1), else_=0)),
+                func.sum(Activity.points_earned),
+                func.avg(Activity.mood_rating),
+                func.avg(Activity.stress_level)
+            )\
                 .filter(Activity.user_id == user_id)\
                 .filter(Activity.timestamp >= since_date)\
-                .all()
-
-            breaks = sum(1 for a in activities if a.activity_type == 'break')
-            stretches = sum(1 for a in activities if a.activity_type == 'stretch')
-            chats = sum(1 for a in activities if a.activity_type == 'chat')
-
-            points = sum(a.points_earned for a in activities if a.points_earned)
+                .one()
 
-            # Average mood and stress
-            mood_activities = [a for a in activities if a.mood_rating]
-            stress_activities = [a for a in activities if a.stress_level]
-
-            avg_mood = sum(a.mood_rating for a in mood_activities) / len(mood_activities) if mood_activities else None
-            avg_stress = sum(a.stress_level for a in stress_activities) / len(stress_activities) if stress_activities else None
+            total, breaks, stretches, chats, points, avg_mood, avg_stress = row
+            breaks = breaks or 0
+            stretches = stretches or 0
+            chats = chats or 0
+            points = points or 0
 
             return {
                 'days': days,
-                'total_activities': len(activities),
+                'total_activities': total,
                 'breaks': breaks,
                 'stretches': stretches,
                 'chats': chats,
                 'points_earned': points,
                 'average_mood': avg_mood,
                 'average_stress': avg_stress,
-                'daily_average': len(activities) / days if days > 0 else 0
+                'daily_average': total / days if days > 0 else 0
             }
-        finally:
-            session.close()
 
+    def get_dashboard(self, user_id: int, days: int = 7) -> Dict[str, Any]:
+        """Get everything the stats dashboard shows in one call.
 
-# Global database instance
-_db_instance = None
+        The user and pet are served from the read caches, so a warm call
+        costs a single aggregate query for the period stats.
 
+        Args:
+            user_id: User ID
+            days: Number of days for the period stats
+
+        Returns:
+            Dictionary with 'user', 'pet' and 'stats'
+        """
+        return {
+            'user': self.get_user(user_id),
+            'pet': self.get_pet(user_id),
+            'stats': self.get_user_stats(user_id, days=days)
+        }
+
+
+# Global database instance
+@functools.cache
 def get_db() -> Database:
     """Get or create global database instance."""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = Database()
-    return _db_instance
+    return Database()
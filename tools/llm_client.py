@@ -0,0 +1,23 @@
+"""Shared Anthropic client for the agents."""
+import functools
+from typing import TYPE_CHECKING, Optional
+
+from config import settings
+
+if TYPE_CHECKING:
+    from anthropic import Anthropic
+
+
+@functools.cache
+def get_anthropic_client() -> Optional["Anthropic"]:
+    """Get the process-wide Anthropic client, or None without an API key.
+
+    The client is thread-safe and keeps a pool of open connections, so one
+    instance serves every user's requests instead of each agent (or each
+    message) paying for a new client and TLS handshake.
+    """
+    if not settings.ANTHROPIC_API_KEY:
+        return None
+
+    from anthropic import Anthropic
+    return Anthropic(api_key=settings.ANTHROPIC_API_KEY)
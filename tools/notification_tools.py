@@ -1,24 +1,75 @@
 """Notification tools for desktop notifications."""
+import functools
 import platform
-from typing import Optional
-
-try:
-    from plyer import notification as plyer_notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    PLYER_AVAILABLE = False
-    print("Warning: plyer not available. Notifications will be simulated.")
+import queue
+import threading
+from typing import Callable, Optional
 
 from config import settings
 
 
+def _print_notification(title: str, message: str, **kwargs):
+    """Fallback backend: just print."""
+    print(f"[Notification] {title}: {message}")
+
+
+def _load_notify_backend() -> Callable[..., None]:
+    """Import plyer and resolve its platform notify function.
+
+    plyer's ``notification`` is a proxy that looks up the platform
+    implementation on every attribute access, so the bound ``notify`` is
+    fetched once here and called directly afterwards.
+    """
+    try:
+        from plyer import notification as plyer_notification
+        return plyer_notification.notify
+    except ImportError:
+        print("Warning: plyer not available. Notifications will be simulated.")
+        return _print_notification
+
+
 class NotificationManager:
     """Manager for desktop notifications."""
 
+    # Pending notifications beyond this are dropped rather than blocking callers
+    QUEUE_SIZE = 256
+
     def __init__(self):
         """Initialize notification manager."""
         self.enabled = settings.NOTIFICATION_ENABLED
         self.platform = platform.system()
+        self._notify = _load_notify_backend()
+
+        # Platform backends can block for a noticeable time, so notifications
+        # are delivered from a background worker
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._worker = threading.Thread(
+            target=self._process_queue,
+            name="notification-worker",
+            daemon=True
+        )
+        self._worker.start()
+
+    def _process_queue(self):
+        """Deliver queued notifications one at a time."""
+        while True:
+            title, message, duration, app_icon = self._queue.get()
+            try:
+                self._deliver(title, message, duration, app_icon)
+            except Exception as e:
+                print(f"Error sending notification: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, title: str, message: str, duration: int, app_icon: Optional[str]):
+        """Show a notification through the platform backend."""
+        self._notify(
+            title=title,
+            message=message,
+            app_name="Wellness App",
+            timeout=duration,
+            app_icon=app_icon
+        )
 
     def send_notification(self, title: str, message: str,
                          duration: int = None, app_icon: str = None) -> bool:
@@ -31,7 +82,7 @@ class NotificationManager:
             app_icon: Path to app icon
 
         Returns:
-            True if notification was sent successfully
+            True if notification was queued for delivery
         """
         if not self.enabled:
             print(f"[Notification disabled] {title}: {message}")
@@ -40,22 +91,10 @@ class NotificationManager:
         duration = duration or settings.NOTIFICATION_DURATION
 
         try:
-            if PLYER_AVAILABLE:
-                plyer_notification.notify(
-                    title=title,
-                    message=message,
-                    app_name="Wellness App",
-                    timeout=duration,
-                    app_icon=app_icon
-                )
-                return True
-            else:
-                # Fallback: just print
-                print(f"[Notification] {title}: {message}")
-                return True
-
-        except Exception as e:
-            print(f"Error sending notification: {e}")
+            self._queue.put_nowait((title, message, duration, app_icon))
+            return True
+        except queue.Full:
+            print(f"Notification queue full, dropping: {title}")
             return False
 
     def send_break_reminder(self, message: str = None) -> bool:
@@ -103,14 +142,10 @@ class NotificationManager:
 
 
 # Global notification manager instance
-_notification_manager = None
-
+@functools.cache
 def get_notification_manager() -> NotificationManager:
     """Get or create global notification manager instance."""
-    global _notification_manager
-    if _notification_manager is None:
-        _notification_manager = NotificationManager()
-    return _notification_manager
+    return NotificationManager()
 
 
 def send_notification(title: str, message: str, **kwargs) -> bool:
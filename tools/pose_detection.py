@@ -1,9 +1,11 @@
 """AI-powered pose detection for stretch guidance using MediaPipe."""
+import functools
 import cv2
 import numpy as np
-from typing import Dict, Any, Tuple, Optional, List
+from typing import Dict, Any, NamedTuple, Tuple, Optional, List
 import math
 
+from config import settings
 from config.color_theme import OpenCVColors
 
 try:
@@ -13,23 +15,241 @@ except ImportError:
     MEDIAPIPE_AVAILABLE = False
     print("Warning: MediaPipe not installed. Pose detection will not work.")
 
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Landmarks whose pixel coordinates detect_pose reports
+KEY_LANDMARKS = (
+    'left_shoulder', 'right_shoulder',
+    'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist',
+    'left_hip', 'right_hip',
+    'left_knee', 'right_knee',
+    'left_ankle', 'right_ankle',
+    'nose',
+)
+
+# BlazePose landmark ids of KEY_LANDMARKS (as in MediaPipe's PoseLandmark)
+BLAZEPOSE_LANDMARK_IDS = {
+    'nose': 0,
+    'left_shoulder': 11, 'right_shoulder': 12,
+    'left_elbow': 13, 'right_elbow': 14,
+    'left_wrist': 15, 'right_wrist': 16,
+    'left_hip': 23, 'right_hip': 24,
+    'left_knee': 25, 'right_knee': 26,
+    'left_ankle': 27, 'right_ankle': 28,
+}
+
+# Joint angles reported by detect_pose, as (point, vertex, point) triplets
+ANGLE_JOINTS = (
+    ('left_elbow', ('left_shoulder', 'left_elbow', 'left_wrist')),
+    ('right_elbow', ('right_shoulder', 'right_elbow', 'right_wrist')),
+    ('left_shoulder', ('left_elbow', 'left_shoulder', 'left_hip')),
+    ('right_shoulder', ('right_elbow', 'right_shoulder', 'right_hip')),
+    ('left_hip', ('left_shoulder', 'left_hip', 'left_knee')),
+    ('right_hip', ('right_shoulder', 'right_hip', 'right_knee')),
+    ('left_knee', ('left_hip', 'left_knee', 'left_ankle')),
+    ('right_knee', ('right_hip', 'right_knee', 'right_ankle')),
+)
+
+# ANGLE_JOINTS triplets as positions in KEY_LANDMARKS, shape (N, 3)
+_ANGLE_TRIPLET_INDEX = np.array(
+    [[KEY_LANDMARKS.index(name) for name in points] for _, points in ANGLE_JOINTS]
+)
+_ANGLE_NAMES = tuple(joint for joint, _ in ANGLE_JOINTS)
+
+
+class PoseAngles(NamedTuple):
+    """Joint angles in degrees, in ANGLE_JOINTS order, plus neck tilt.
+
+    Angles detect_pose was not asked to calculate are None. neck_tilt is the
+    horizontal pixel offset of the nose from the shoulder midpoint.
+    """
+    neck_tilt: float
+    left_elbow: Optional[float] = None
+    right_elbow: Optional[float] = None
+    left_shoulder: Optional[float] = None
+    right_shoulder: Optional[float] = None
+    left_hip: Optional[float] = None
+    right_hip: Optional[float] = None
+    left_knee: Optional[float] = None
+    right_knee: Optional[float] = None
+
+
+# Joint angles each kind of stretch is judged on (neck tilt is always reported)
+STRETCH_ANGLES = {
+    'neck': (),
+    'shoulder': ('left_shoulder', 'right_shoulder'),
+    'back': ('left_hip', 'right_hip'),
+    'generic': (),
+}
+
+
+def _stretch_kind(stretch_type: str) -> str:
+    """Map a stretch category to the kind of analysis used for it."""
+    stretch_type = stretch_type.lower()
+    for kind in ('neck', 'shoulder', 'back'):
+        if kind in stretch_type:
+            return kind
+    return 'generic'
+
+
+@functools.lru_cache(maxsize=None)
+def _angle_subset(names: Tuple[str, ...]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Get the triplet index rows for a subset of ANGLE_JOINTS."""
+    rows = [_ANGLE_NAMES.index(name) for name in names]
+    return _ANGLE_TRIPLET_INDEX[rows], names
+
+
+def calculate_angles(triplets: np.ndarray) -> np.ndarray:
+    """Calculate the angle at the vertex of many point triplets at once.
+
+    Args:
+        triplets: Array of shape (N, 3, 2) holding (point1, vertex, point3)
+
+    Returns:
+        Array of N angles in degrees (0 where a vector has zero length)
+    """
+    vector1 = triplets[:, 0] - triplets[:, 1]
+    vector2 = triplets[:, 2] - triplets[:, 1]
+
+    dot_products = np.einsum('ij,ij->i', vector1, vector2)
+    magnitudes = np.linalg.norm(vector1, axis=1) * np.linalg.norm(vector2, axis=1)
+
+    degenerate = magnitudes == 0
+    cos_angles = np.clip(dot_products / np.where(degenerate, 1, magnitudes), -1, 1)
+
+    angles = np.degrees(np.arccos(cos_angles))
+    angles[degenerate] = 0
+    return angles
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _calculate_angles_jit(triplets: np.ndarray) -> np.ndarray:
+        """Compiled calculate_angles(): one fused loop, no temporaries."""
+        angles = np.zeros(triplets.shape[0])
+        for i in range(triplets.shape[0]):
+            x1 = triplets[i, 0, 0] - triplets[i, 1, 0]
+            y1 = triplets[i, 0, 1] - triplets[i, 1, 1]
+            x2 = triplets[i, 2, 0] - triplets[i, 1, 0]
+            y2 = triplets[i, 2, 1] - triplets[i, 1, 1]
+
+            magnitudes = math.sqrt(x1 * x1 + y1 * y1) * math.sqrt(x2 * x2 + y2 * y2)
+            if magnitudes == 0:
+                continue
+
+            cos_angle = min(1.0, max(-1.0, (x1 * x2 + y1 * y2) / magnitudes))
+            angles[i] = math.degrees(math.acos(cos_angle))
+        return angles
+
+    # Compile at import so the first camera frame isn't stalled by the JIT
+    _calculate_angles_jit(np.zeros((1, 3, 2)))
+    _compute_angles = _calculate_angles_jit
+else:
+    _compute_angles = calculate_angles
+
+
+def _build_pose_data(landmarks: Any, key_points: np.ndarray,
+                     angles: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """Build detect_pose() results from the pixel positions of KEY_LANDMARKS.
+
+    Args:
+        landmarks: Detector-specific landmarks, kept for drawing
+        key_points: Integer pixel coordinates of KEY_LANDMARKS, shape (N, 2)
+        angles: Names from ANGLE_JOINTS to calculate (default: all)
+
+    Returns:
+        Dictionary with 'landmarks', pixel 'coordinates' and PoseAngles 'angles'
+    """
+    coordinates = dict(zip(KEY_LANDMARKS, map(tuple, key_points.tolist())))
+    left_shoulder = coordinates['left_shoulder']
+    right_shoulder = coordinates['right_shoulder']
+    nose = coordinates['nose']
+
+    # Calculate the requested joint angles in one vectorized pass
+    if angles is None:
+        triplet_index, angle_names = _ANGLE_TRIPLET_INDEX, _ANGLE_NAMES
+    else:
+        triplet_index, angle_names = _angle_subset(tuple(angles))
+
+    # Calculate neck tilt (for neck stretches)
+    neck_tilt = abs(nose[0] - (left_shoulder[0] + right_shoulder[0]) / 2)
+
+    if angle_names is _ANGLE_NAMES:
+        triplets = key_points[triplet_index].astype(np.float64)
+        joint_angles = PoseAngles(neck_tilt, *_compute_angles(triplets).tolist())
+    elif angle_names:
+        triplets = key_points[triplet_index].astype(np.float64)
+        joint_angles = PoseAngles(neck_tilt, **dict(zip(angle_names, _compute_angles(triplets).tolist())))
+    else:
+        joint_angles = PoseAngles(neck_tilt)
+
+    return {
+        'landmarks': landmarks,
+        'coordinates': coordinates,
+        'angles': joint_angles
+    }
+
 
 class PoseDetector:
     """Detects human poses using MediaPipe for stretch guidance."""
 
-    def __init__(self):
-        """Initialize pose detector."""
+    # Longest side, in pixels, of the frame handed to MediaPipe. Its model
+    # runs on a small fixed-size input, so larger frames only cost time.
+    MAX_INFERENCE_SIZE = 640
+
+    def __init__(self, model_complexity: int = 0, max_inference_size: Optional[int] = None):
+        """Initialize pose detector.
+
+        Args:
+            model_complexity: MediaPipe pose model (0 = Lite, 1 = Full, 2 = Heavy).
+                Lite is accurate enough for the coarse stretch checks and
+                roughly twice as fast on CPU.
+            max_inference_size: Longest side of the frame handed to MediaPipe
+                (default: MAX_INFERENCE_SIZE)
+        """
         if not MEDIAPIPE_AVAILABLE:
             raise ImportError("MediaPipe is required for pose detection")
 
+        self.max_inference_size = max_inference_size or self.MAX_INFERENCE_SIZE
+
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
 
+        # The default style is a fresh dict of DrawingSpecs on every call,
+        # so build it once and reuse it for every frame
+        self._landmark_style = self.mp_drawing_styles.get_default_pose_landmarks_style()
+        # Same colors in RGB order, for frames that arrive as RGB
+        self._landmark_style_rgb = {
+            landmark: self.mp_drawing.DrawingSpec(
+                color=spec.color[::-1],
+                thickness=spec.thickness,
+                circle_radius=spec.circle_radius
+            )
+            for landmark, spec in self._landmark_style.items()
+        }
+
+        # MediaPipe landmark ids of KEY_LANDMARKS, resolved once
+        self._landmark_index = np.array(
+            [int(self.mp_pose.PoseLandmark[name.upper()]) for name in KEY_LANDMARKS]
+        )
+
         # Initialize pose detector
         self.pose = self.mp_pose.Pose(
             static_image_mode=False,
-            model_complexity=1,
+            model_complexity=model_complexity,
             smooth_landmarks=True,
             enable_segmentation=False,
             min_detection_confidence=0.5,
@@ -67,33 +287,37 @@ class PoseDetector:
         angle = math.acos(cos_angle)
         return math.degrees(angle)
 
-    def get_landmark_coordinates(self, landmarks, landmark_id: int,
-                                 image_width: int, image_height: int) -> Tuple[float, float]:
-        """Get pixel coordinates for a landmark.
-
-        Args:
-            landmarks: MediaPipe pose landmarks
-            landmark_id: ID of the landmark
-            image_width: Width of the image
-            image_height: Height of the image
-
-        Returns:
-            (x, y) coordinates in pixels
-        """
-        landmark = landmarks.landmark[landmark_id]
-        return (int(landmark.x * image_width), int(landmark.y * image_height))
-
-    def detect_pose(self, image: np.ndarray) -> Optional[Dict[str, Any]]:
+    def detect_pose(self, image: np.ndarray,
+                    angles: Optional[Tuple[str, ...]] = None,
+                    rgb: bool = False) -> Optional[Dict[str, Any]]:
         """Detect pose in an image.
 
         Args:
             image: Input image (BGR format from OpenCV)
+            angles: Names from ANGLE_JOINTS to calculate (default: all)
+            rgb: Whether the image is already RGB (as from Gradio), which
+                MediaPipe takes as-is
 
         Returns:
-            Dictionary containing pose information or None if no pose detected
+            Dictionary with 'landmarks', pixel 'coordinates' and PoseAngles
+            'angles', or None if no pose detected
         """
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Get image dimensions
+        height, width = image.shape[:2]
+
+        # Downscale large frames before inference. Landmarks are normalized,
+        # so they still map onto the full-size frame below.
+        scale = self.max_inference_size / max(height, width)
+        if scale < 1.0:
+            small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            # Convert BGR to RGB in place; the resized frame is our own copy
+            image_rgb = small if rgb else cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+        elif rgb:
+            image_rgb = image
+        else:
+            # Convert BGR to RGB with a single contiguous channel-reversed copy,
+            # leaving the caller's frame untouched for drawing
+            image_rgb = np.ascontiguousarray(image[..., ::-1])
 
         # Process image
         results = self.pose.process(image_rgb)
@@ -101,76 +325,25 @@ class PoseDetector:
         if not results.pose_landmarks:
             return None
 
-        # Get image dimensions
-        height, width = image.shape[:2]
-
         # Extract key landmarks
         landmarks = results.pose_landmarks
 
-        # Get coordinates for key points
-        left_shoulder = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.LEFT_SHOULDER, width, height)
-        right_shoulder = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.RIGHT_SHOULDER, width, height)
-        left_elbow = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.LEFT_ELBOW, width, height)
-        right_elbow = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.RIGHT_ELBOW, width, height)
-        left_wrist = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.LEFT_WRIST, width, height)
-        right_wrist = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.RIGHT_WRIST, width, height)
-        left_hip = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.LEFT_HIP, width, height)
-        right_hip = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.RIGHT_HIP, width, height)
-        left_knee = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.LEFT_KNEE, width, height)
-        right_knee = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.RIGHT_KNEE, width, height)
-        left_ankle = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.LEFT_ANKLE, width, height)
-        right_ankle = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.RIGHT_ANKLE, width, height)
-        nose = self.get_landmark_coordinates(landmarks, self.mp_pose.PoseLandmark.NOSE, width, height)
-
-        # Calculate important angles
-        left_elbow_angle = self.calculate_angle(left_shoulder, left_elbow, left_wrist)
-        right_elbow_angle = self.calculate_angle(right_shoulder, right_elbow, right_wrist)
-        left_shoulder_angle = self.calculate_angle(left_elbow, left_shoulder, left_hip)
-        right_shoulder_angle = self.calculate_angle(right_elbow, right_shoulder, right_hip)
-        left_hip_angle = self.calculate_angle(left_shoulder, left_hip, left_knee)
-        right_hip_angle = self.calculate_angle(right_shoulder, right_hip, right_knee)
-        left_knee_angle = self.calculate_angle(left_hip, left_knee, left_ankle)
-        right_knee_angle = self.calculate_angle(right_hip, right_knee, right_ankle)
-
-        # Calculate neck tilt (for neck stretches)
-        neck_tilt = abs(nose[0] - (left_shoulder[0] + right_shoulder[0]) / 2)
+        # Convert all landmarks to pixel coordinates in one pass
+        pixels = (
+            np.array([(lm.x, lm.y) for lm in landmarks.landmark], dtype=np.float64)
+            * (width, height)
+        ).astype(np.int32)
 
-        return {
-            'landmarks': landmarks,
-            'coordinates': {
-                'left_shoulder': left_shoulder,
-                'right_shoulder': right_shoulder,
-                'left_elbow': left_elbow,
-                'right_elbow': right_elbow,
-                'left_wrist': left_wrist,
-                'right_wrist': right_wrist,
-                'left_hip': left_hip,
-                'right_hip': right_hip,
-                'left_knee': left_knee,
-                'right_knee': right_knee,
-                'left_ankle': left_ankle,
-                'right_ankle': right_ankle,
-                'nose': nose,
-            },
-            'angles': {
-                'left_elbow': left_elbow_angle,
-                'right_elbow': right_elbow_angle,
-                'left_shoulder': left_shoulder_angle,
-                'right_shoulder': right_shoulder_angle,
-                'left_hip': left_hip_angle,
-                'right_hip': right_hip_angle,
-                'left_knee': left_knee_angle,
-                'right_knee': right_knee_angle,
-                'neck_tilt': neck_tilt,
-            }
-        }
+        return _build_pose_data(landmarks, pixels[self._landmark_index], angles)
 
-    def draw_pose(self, image: np.ndarray, pose_data: Dict[str, Any]) -> np.ndarray:
+    def draw_pose(self, image: np.ndarray, pose_data: Dict[str, Any],
+                  rgb: bool = False) -> np.ndarray:
         """Draw pose landmarks on image.
 
         Args:
             image: Input image
             pose_data: Pose data from detect_pose()
+            rgb: Whether the image is RGB rather than BGR
 
         Returns:
             Image with pose drawn
@@ -180,22 +353,339 @@ class PoseDetector:
                 image,
                 pose_data['landmarks'],
                 self.mp_pose.POSE_CONNECTIONS,
-                landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
+                landmark_drawing_spec=self._landmark_style_rgb if rgb else self._landmark_style
             )
         return image
 
+    def reset(self):
+        """Clear tracking state so the next frame runs full detection.
+
+        The Pose instance runs in streaming mode and tracks the person from
+        frame to frame, so it is reused across calls and only reset when a
+        different stretch starts.
+        """
+        if self.pose:
+            self.pose.reset()
+
     def close(self):
         """Close the pose detector."""
         if self.pose:
             self.pose.close()
 
 
+class OnnxPoseDetector:
+    """Detects human poses with a BlazePose landmark model on ONNX Runtime.
+
+    An alternative to PoseDetector for CPUs where an ONNX export of the
+    pose landmark model (optionally INT8-quantized with
+    quantize_pose_model()) runs faster than MediaPipe. The whole frame is
+    letterboxed into the model input, with no separate person detector or
+    ROI tracking, so it suits a webcam framing one person at a desk.
+    """
+
+    # Pose presence (0-1) below which a frame counts as having no pose
+    MIN_PRESENCE = 0.5
+
+    # Drawing colors (BGR)
+    LANDMARK_COLOR = (0, 138, 255)
+    CONNECTION_COLOR = (224, 224, 224)
+
+    # Lines drawn between KEY_LANDMARKS, as index pairs
+    SKELETON = tuple(
+        (KEY_LANDMARKS.index(start), KEY_LANDMARKS.index(end)) for start, end in (
+            ('left_shoulder', 'right_shoulder'), ('left_hip', 'right_hip'),
+            ('left_shoulder', 'left_elbow'), ('left_elbow', 'left_wrist'),
+            ('right_shoulder', 'right_elbow'), ('right_elbow', 'right_wrist'),
+            ('left_shoulder', 'left_hip'), ('right_shoulder', 'right_hip'),
+            ('left_hip', 'left_knee'), ('left_knee', 'left_ankle'),
+            ('right_hip', 'right_knee'), ('right_knee', 'right_ankle'),
+        )
+    )
+
+    def __init__(self, model_path: str, num_threads: int = 1):
+        """Initialize the ONNX pose detector.
+
+        Args:
+            model_path: Path to the ONNX pose landmark model
+            num_threads: Threads ONNX Runtime uses per inference; each
+                session has its own detector, so keep this small
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is required for the ONNX pose detector")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+
+        # BlazePose exports take a square NHWC float image in [0, 1]
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self._channels_first = model_input.shape[1] == 3
+        self.input_size = int(model_input.shape[2 if self._channels_first else 1])
+        self._canvas = np.zeros((self.input_size, self.input_size, 3), dtype=np.float32)
+
+        # Landmarks (x, y, z, visibility, presence per point, in input
+        # pixels) and the pose presence logit; other outputs are not fetched
+        landmarks_output = presence_output = None
+        for output in self.session.get_outputs():
+            size = math.prod(d for d in output.shape if isinstance(d, int))
+            if size == 1 and presence_output is None:
+                presence_output = output.name
+            elif size >= 33 * 5 and size % 5 == 0 and landmarks_output is None:
+                landmarks_output = output.name
+        if landmarks_output is None or presence_output is None:
+            raise ValueError(f"{model_path} does not look like a BlazePose landmark model")
+        self._output_names = [landmarks_output, presence_output]
+
+        # BlazePose landmark ids of KEY_LANDMARKS
+        self._landmark_index = np.array([BLAZEPOSE_LANDMARK_IDS[name] for name in KEY_LANDMARKS])
+
+    def detect_pose(self, image: np.ndarray,
+                    angles: Optional[Tuple[str, ...]] = None,
+                    rgb: bool = False) -> Optional[Dict[str, Any]]:
+        """Detect pose in an image.
+
+        Args:
+            image: Input image (BGR format from OpenCV)
+            angles: Names from ANGLE_JOINTS to calculate (default: all)
+            rgb: Whether the image is already RGB (as from Gradio)
+
+        Returns:
+            Dictionary with 'landmarks', pixel 'coordinates' and PoseAngles
+            'angles', or None if no pose detected
+        """
+        height, width = image.shape[:2]
+
+        # Letterbox the frame into the model input: scale the longest side
+        # to fit, center it and leave the rest black
+        scale = self.input_size / max(height, width)
+        resized = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+        rows, cols = resized.shape[:2]
+        top = (self.input_size - rows) // 2
+        left = (self.input_size - cols) // 2
+        canvas = self._canvas
+        canvas.fill(0)
+        np.multiply(resized if rgb else resized[..., ::-1], 1 / 255,
+                    out=canvas[top:top + rows, left:left + cols], casting='unsafe')
+
+        tensor = canvas.transpose(2, 0, 1) if self._channels_first else canvas
+        landmarks, presence = self.session.run(
+            self._output_names, {self._input_name: np.ascontiguousarray(tensor[None])}
+        )
+
+        if 1 / (1 + math.exp(-float(presence.ravel()[0]))) < self.MIN_PRESENCE:
+            return None
+
+        # Model input pixels to frame pixels
+        points = landmarks.reshape(-1, 5)[:33, :2]
+        pixels = ((points - (left, top)) / scale).astype(np.int32)
+
+        return _build_pose_data(pixels, pixels[self._landmark_index], angles)
+
+    def draw_pose(self, image: np.ndarray, pose_data: Dict[str, Any],
+                  rgb: bool = False) -> np.ndarray:
+        """Draw the key landmarks and the lines between them on image.
+
+        Args:
+            image: Input image
+            pose_data: Pose data from detect_pose()
+            rgb: Whether the image is RGB rather than BGR
+
+        Returns:
+            Image with pose drawn
+        """
+        if pose_data:
+            points = [pose_data['coordinates'][name] for name in KEY_LANDMARKS]
+            for start, end in self.SKELETON:
+                cv2.line(image, points[start], points[end], self.CONNECTION_COLOR, 2)
+
+            color = self.LANDMARK_COLOR[::-1] if rgb else self.LANDMARK_COLOR
+            for point in points:
+                cv2.circle(image, point, 4, color, -1)
+        return image
+
+    def reset(self):
+        """Nothing to reset; every frame is detected independently."""
+
+    def close(self):
+        """Release the ONNX Runtime session."""
+        self.session = None
+
+
+def quantize_pose_model(model_path: str, output_path: str) -> str:
+    """Write an INT8 copy of an ONNX pose model for OnnxPoseDetector.
+
+    Weights are quantized to INT8 ahead of time (activations are quantized
+    at run time), which halves the model size and uses the CPU's integer
+    dot-product instructions where available.
+
+    Args:
+        model_path: Path to the FP32 ONNX model
+        output_path: Where to write the quantized model
+
+    Returns:
+        output_path
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+
+def create_pose_detector():
+    """Create the configured pose detector.
+
+    Uses OnnxPoseDetector when ONNX_POSE_PATH is set and onnxruntime is
+    installed, and MediaPipe's PoseDetector otherwise.
+
+    Returns:
+        Pose detector, or None if no backend is available
+    """
+    if settings.ONNX_POSE_PATH:
+        if ONNXRUNTIME_AVAILABLE:
+            return OnnxPoseDetector(settings.ONNX_POSE_PATH, settings.ONNX_INTRA_OP_THREADS)
+        print("Warning: ONNX_POSE_PATH is set but onnxruntime is not installed. Using MediaPipe.")
+
+    if not MEDIAPIPE_AVAILABLE:
+        return None
+    return PoseDetector(
+        model_complexity=settings.POSE_MODEL_COMPLEXITY,
+        max_inference_size=settings.POSE_INFERENCE_SIZE
+    )
+
+
 class StretchAnalyzer:
     """Analyzes poses to provide stretch guidance."""
 
+    # Run pose detection on at most one in this many frames while the
+    # scene is still; feedback only needs a few updates per second
+    DETECT_EVERY_N_FRAMES = 3
+
+    # Once the form score has stayed above HELD_POSE_SCORE for
+    # HELD_POSE_FRAMES frames, the user is holding the stretch and still
+    # frames are re-detected less often; motion or a lower score restores
+    # the normal rate
+    HELD_POSE_SCORE = 80
+    HELD_POSE_FRAMES = 30
+    HELD_POSE_DETECT_EVERY_N_FRAMES = 6
+
+    # Mean absolute difference (0-255) between thumbnails of consecutive
+    # frames above which the pose is re-detected immediately
+    MOTION_THRESHOLD = 8.0
+
+    # Thumbnail size (width, height) used for motion checks
+    MOTION_THUMBNAIL_SIZE = (80, 60)
+
+    # Height of the pre-rendered feedback text layer, and how many
+    # (feedback, score, width) renderings to keep
+    TEXT_OVERLAY_HEIGHT = 110
+    MAX_TEXT_OVERLAYS = 64
+
     def __init__(self):
         """Initialize stretch analyzer."""
-        self.pose_detector = PoseDetector() if MEDIAPIPE_AVAILABLE else None
+        self.pose_detector = create_pose_detector()
+
+        # Analysis for each kind of stretch (see _stretch_kind)
+        self._analyzers = {
+            'neck': self.analyze_neck_stretch,
+            'shoulder': self.analyze_shoulder_stretch,
+            'back': self.analyze_back_stretch,
+            'generic': self.analyze_generic_stretch,
+        }
+
+        # Last detection result, reused for frames where nothing moved
+        self._frame_counter = 0
+        self._cached_pose = None
+        self._cached_kind = None
+        self._last_small_frame = None
+        self._last_frame_shape = None
+        self._good_form_streak = 0
+
+        # Rendered feedback text, keyed by (feedback, score, frame width)
+        self._text_overlays = {}
+
+        # Blend the feedback panel through OpenCL (OpenCV's UMat) when
+        # enabled and a device is present. MediaPipe and the landmark
+        # drawing still work on the frame in CPU memory.
+        self._use_opencl = settings.POSE_USE_OPENCL and cv2.ocl.haveOpenCL()
+        if self._use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+
+    def _get_pose(self, image: np.ndarray, kind: str, rgb: bool = False) -> Optional[Dict[str, Any]]:
+        """Detect the pose in a frame, reusing the last result when possible.
+
+        Args:
+            image: Input image from camera
+            kind: Kind of stretch, which decides the angles calculated
+            rgb: Whether the image is RGB rather than BGR
+
+        Returns:
+            Pose data from PoseDetector, or None if no pose detected
+        """
+        small = cv2.resize(image, self.MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        frame_index = self._frame_counter
+        self._frame_counter += 1
+
+        if self._good_form_streak >= self.HELD_POSE_FRAMES:
+            detect_every = self.HELD_POSE_DETECT_EVERY_N_FRAMES
+        else:
+            detect_every = self.DETECT_EVERY_N_FRAMES
+
+        if (frame_index % detect_every != 0
+                and self._last_small_frame is not None
+                and kind == self._cached_kind
+                and image.shape == self._last_frame_shape
+                and np.mean(cv2.absdiff(small, self._last_small_frame)) < self.MOTION_THRESHOLD):
+            self._last_small_frame = small
+            return self._cached_pose
+
+        self._cached_pose = self.pose_detector.detect_pose(image, STRETCH_ANGLES[kind], rgb)
+        self._cached_kind = kind
+        self._last_small_frame = small
+        self._last_frame_shape = image.shape
+        return self._cached_pose
+
+    def _get_text_overlay(self, feedback: str, score: int, score_color: Tuple[int, int, int],
+                          width: int, rgb: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the feedback text rendered onto a transparent layer.
+
+        Feedback messages and scores come from a small fixed set, so each
+        combination is rasterized once and copied onto later frames.
+
+        Args:
+            feedback: Feedback message
+            score: Form score
+            score_color: Color for the score line (BGR)
+            width: Width of the frame
+            rgb: Whether to render the layer in RGB rather than BGR
+
+        Returns:
+            Tuple of (text layer, boolean mask of text pixels)
+        """
+        key = (feedback, score, width, rgb)
+        overlay = self._text_overlays.get(key)
+        if overlay is None:
+            text_color = OpenCVColors.TEXT_PRIMARY
+            if rgb:
+                text_color, score_color = text_color[::-1], score_color[::-1]
+            layer = np.zeros((self.TEXT_OVERLAY_HEIGHT, width, 3), dtype=np.uint8)
+            mask = np.zeros((self.TEXT_OVERLAY_HEIGHT, width), dtype=np.uint8)
+
+            for target, feedback_color, line_color in ((layer, text_color, score_color),
+                                                       (mask, 255, 255)):
+                cv2.putText(target, feedback, (20, 40),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, feedback_color, 2)
+                cv2.putText(target, f"Form Score: {score}%", (20, 75),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, line_color, 2)
+
+            if len(self._text_overlays) >= self.MAX_TEXT_OVERLAYS:
+                self._text_overlays.clear()
+            overlay = (layer, mask.astype(bool))
+            self._text_overlays[key] = overlay
+        return overlay
 
     def analyze_neck_stretch(self, pose_data: Dict[str, Any], side: str = 'left') -> Dict[str, Any]:
         """Analyze neck side stretch form.
@@ -210,8 +700,7 @@ class StretchAnalyzer:
         if not pose_data:
             return {'valid': False, 'feedback': 'No pose detected'}
 
-        angles = pose_data['angles']
-        neck_tilt = angles['neck_tilt']
+        neck_tilt = pose_data['angles'].neck_tilt
 
         # Check if head is tilted enough (should be at least 20 pixels from center)
         if neck_tilt < 20:
@@ -250,8 +739,8 @@ class StretchAnalyzer:
         angles = pose_data['angles']
 
         # Check shoulder angles (arms should be raised)
-        left_shoulder = angles['left_shoulder']
-        right_shoulder = angles['right_shoulder']
+        left_shoulder = angles.left_shoulder
+        right_shoulder = angles.right_shoulder
 
         # For shoulder rolls, shoulders should be moving (angles changing)
         # For now, check if arms are in good position
@@ -283,8 +772,8 @@ class StretchAnalyzer:
         angles = pose_data['angles']
 
         # Check hip flexion for forward bend
-        left_hip = angles['left_hip']
-        right_hip = angles['right_hip']
+        left_hip = angles.left_hip
+        right_hip = angles.right_hip
 
         avg_hip_angle = (left_hip + right_hip) / 2
 
@@ -325,36 +814,55 @@ class StretchAnalyzer:
             'score': 85
         }
 
-    def analyze_stretch(self, image: np.ndarray, stretch_type: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+    def analyze_stretch(self, image: np.ndarray, stretch_type: str,
+                        rgb: bool = False,
+                        out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
         """Analyze a stretch from an image.
 
+        The annotations are drawn directly onto ``image`` unless ``out`` is
+        given or ``image`` is read-only, in which case the frame is copied
+        into ``out`` (or a new array) and annotated there. Frames with no
+        pose detected are returned untouched.
+
         Args:
             image: Input image from camera
             stretch_type: Type of stretch being performed
+            rgb: Whether the image is RGB (as Gradio delivers it) rather than
+                BGR; annotations are then drawn in RGB too
+            out: Reusable buffer, the same shape and dtype as image, for
+                callers that must keep image unmodified
 
         Returns:
             Tuple of (annotated image, analysis results)
         """
         if not self.pose_detector:
-            return image, {'valid': False, 'feedback': 'MediaPipe not available'}
+            return image, {'valid': False, 'feedback': 'Pose detection not available'}
 
-        # Detect pose
-        pose_data = self.pose_detector.detect_pose(image)
+        kind = _stretch_kind(stretch_type)
 
-        # Annotate image
-        annotated_image = image.copy()
-        if pose_data:
-            annotated_image = self.pose_detector.draw_pose(annotated_image, pose_data)
+        # Detect pose (reused from a recent frame if the scene is still)
+        pose_data = self._get_pose(image, kind, rgb)
+
+        # Nothing to annotate while the user is out of frame; the feedback
+        # text reaches the UI through the analysis results
+        if not pose_data:
+            self._good_form_streak = 0
+            return image, self._analyzers[kind](pose_data)
+
+        # Annotate image (camera frames are discarded after this call)
+        if out is not None:
+            np.copyto(out, image)
+            annotated_image = out
+        else:
+            annotated_image = image if image.flags.writeable else image.copy()
+        annotated_image = self.pose_detector.draw_pose(annotated_image, pose_data, rgb)
 
         # Analyze based on stretch type
-        if 'neck' in stretch_type.lower():
-            analysis = self.analyze_neck_stretch(pose_data)
-        elif 'shoulder' in stretch_type.lower():
-            analysis = self.analyze_shoulder_stretch(pose_data)
-        elif 'back' in stretch_type.lower():
-            analysis = self.analyze_back_stretch(pose_data)
+        analysis = self._analyzers[kind](pose_data)
+        if analysis.get('score', 0) > self.HELD_POSE_SCORE:
+            self._good_form_streak += 1
         else:
-            analysis = self.analyze_generic_stretch(pose_data)
+            self._good_form_streak = 0
 
         # Add text feedback to image
         feedback = analysis.get('feedback', 'Keep stretching!')
@@ -368,19 +876,34 @@ class StretchAnalyzer:
         else:
             score_color = OpenCVColors.POOR_FORM  # Red for poor form
 
-        # Add semi-transparent overlay for feedback
-        overlay = annotated_image.copy()
-        cv2.rectangle(overlay, (10, 10), (annotated_image.shape[1] - 10, 100), OpenCVColors.BACKGROUND, -1)
-        annotated_image = cv2.addWeighted(annotated_image, 0.7, overlay, 0.3, 0)
+        # Add semi-transparent overlay for feedback, blending only the panel
+        panel = annotated_image[10:101, 10:annotated_image.shape[1] - 9]
+        background = np.full_like(panel, OpenCVColors.BACKGROUND[::-1] if rgb else OpenCVColors.BACKGROUND)
+        if self._use_opencl:
+            panel[:] = cv2.addWeighted(cv2.UMat(panel), 0.7, cv2.UMat(background), 0.3, 0).get()
+        else:
+            panel[:] = cv2.addWeighted(panel, 0.7, background, 0.3, 0)
 
         # Add feedback text with psychology-based colors
-        cv2.putText(annotated_image, feedback, (20, 40),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, OpenCVColors.TEXT_PRIMARY, 2)
-        cv2.putText(annotated_image, f"Form Score: {score}%", (20, 75),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, score_color, 2)
+        text_layer, text_mask = self._get_text_overlay(
+            feedback, score, score_color, annotated_image.shape[1], rgb
+        )
+        rows = min(annotated_image.shape[0], self.TEXT_OVERLAY_HEIGHT)
+        np.copyto(annotated_image[:rows], text_layer[:rows], where=text_mask[:rows, :, None])
 
         return annotated_image, analysis
 
+    def reset(self):
+        """Forget the cached pose and the detector's tracking state."""
+        self._frame_counter = 0
+        self._cached_pose = None
+        self._cached_kind = None
+        self._last_small_frame = None
+        self._last_frame_shape = None
+        self._good_form_streak = 0
+        if self.pose_detector:
+            self.pose_detector.reset()
+
     def close(self):
         """Close the stretch analyzer."""
         if self.pose_detector:
@@ -0,0 +1,223 @@
+"""Stretch analysis in a separate worker process.
+
+Pose detection releases the GIL inside MediaPipe, but the NumPy drawing
+around it does not, so analyzing camera frames in the app process slows
+down chat streaming for every user. StretchAnalyzerProcess runs a
+StretchAnalyzer in its own process instead: frames are passed through
+shared memory and only the stretch type and analysis results go through
+the pipe.
+"""
+import multiprocessing as mp
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+
+# Worker processes (each with its own pose model) running at once
+_worker_slots = threading.BoundedSemaphore(settings.POSE_MAX_WORKERS)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a buffer the app process created, without tracking it.
+
+    The app process tracks and unlinks its buffers. Before Python 3.13
+    attaching registers the buffer with the resource tracker as well,
+    which can then report it as leaked and unlink it a second time.
+    Unregistering afterwards would drop the app process's registration
+    too, since spawned workers share its tracker, so the worker never
+    registers the buffer in the first place.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _pose_worker(conn):
+    """Serve frame requests from the app process until told to stop.
+
+    Messages are tuples starting with a command:
+    ('buffer', name, shape) attaches the shared frame buffer,
+    ('frame', stretch_type, rgb) analyzes the frame in it, leaves the
+    annotated frame in the buffer and replies with the analysis results,
+    ('reset',) resets the analyzer and ('close',) stops the worker.
+    """
+    from tools.pose_detection import create_stretch_analyzer
+
+    analyzer = create_stretch_analyzer()
+    shm = None
+    frame = None
+    try:
+        while True:
+            message = conn.recv()
+            command = message[0]
+            if command == 'frame':
+                _, stretch_type, rgb = message
+                try:
+                    annotated_image, analysis = analyzer.analyze_stretch(frame, stretch_type, rgb)
+                    if annotated_image is not frame:
+                        np.copyto(frame, annotated_image)
+                except Exception as e:
+                    # One bad frame should not end the session's analysis
+                    print(f"Error analyzing frame: {e}")
+                    analysis = {'valid': False, 'feedback': 'Could not analyze this frame', 'score': 0}
+                conn.send(analysis)
+            elif command == 'buffer':
+                _, name, shape = message
+                frame = None
+                if shm:
+                    shm.close()
+                shm = _attach_shared_memory(name)
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            elif command == 'reset':
+                analyzer.reset()
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        # The app process went away (or is shutting down)
+        pass
+    finally:
+        frame = None
+        if shm:
+            shm.close()
+        analyzer.close()
+        conn.close()
+
+
+class StretchAnalyzerProcess:
+    """StretchAnalyzer running in a worker process.
+
+    Has the same analyze_stretch/reset/close interface as StretchAnalyzer.
+    Each instance owns one worker, so pose tracking carries over between
+    frames just as with an in-process analyzer. Calls block until the
+    worker replies, but the waiting thread does not hold the GIL.
+    """
+
+    # Seconds to wait for the worker to exit before (and after) killing it
+    SHUTDOWN_TIMEOUT = 5.0
+
+    def __init__(self):
+        """Start the worker process.
+
+        Raises:
+            RuntimeError: If POSE_MAX_WORKERS workers are already running
+        """
+        if not _worker_slots.acquire(blocking=False):
+            raise RuntimeError(f"All {settings.POSE_MAX_WORKERS} pose workers are in use")
+
+        # Spawned rather than forked: the app process runs server threads
+        context = mp.get_context('spawn')
+        try:
+            self._conn, worker_conn = context.Pipe()
+            self._process = context.Process(target=_pose_worker, args=(worker_conn,), daemon=True)
+            self._process.start()
+        except Exception:
+            _worker_slots.release()
+            raise
+        worker_conn.close()
+
+        # Frame buffer shared with the worker, sized for the current camera
+        self._shm = None
+        self._frame = None
+        # Requests and replies must not interleave between threads
+        self._lock = threading.Lock()
+
+    def _attach_buffer(self, shape: Tuple[int, ...]):
+        """Share a new frame buffer of the given shape with the worker."""
+        self._release_buffer()
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._frame = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._conn.send(('buffer', self._shm.name, shape))
+
+    def _release_buffer(self):
+        """Free the shared frame buffer (the worker keeps its own mapping)."""
+        self._frame = None
+        if self._shm:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def analyze_stretch(self, image: np.ndarray, stretch_type: str,
+                        rgb: bool = False) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Analyze a stretch from an image in the worker process.
+
+        Args:
+            image: Input image from camera (8-bit, 3 channels)
+            stretch_type: Type of stretch being performed
+            rgb: Whether the image is RGB rather than BGR
+
+        Returns:
+            Tuple of (annotated image, analysis results)
+        """
+        with self._lock:
+            if self._process is None:
+                return image, {'valid': False, 'feedback': 'Pose detection not available'}
+
+            try:
+                if self._frame is None or self._frame.shape != image.shape:
+                    self._attach_buffer(image.shape)
+                np.copyto(self._frame, image)
+                self._conn.send(('frame', stretch_type, rgb))
+                analysis = self._conn.recv()
+            except (EOFError, OSError) as e:
+                print(f"Warning: Pose worker stopped: {e}")
+                self._shutdown()
+                return image, {'valid': False, 'feedback': 'Pose detection not available'}
+
+            # Copied out before the next frame overwrites the buffer
+            annotated_image = image if image.flags.writeable else np.empty_like(image)
+            np.copyto(annotated_image, self._frame)
+            return annotated_image, analysis
+
+    def reset(self):
+        """Forget the worker's cached pose and tracking state."""
+        with self._lock:
+            if self._process is not None:
+                try:
+                    self._conn.send(('reset',))
+                except OSError as e:
+                    print(f"Warning: Pose worker stopped: {e}")
+                    self._shutdown()
+
+    def _shutdown(self):
+        """Stop the worker, killing it if it does not exit, and free the buffer."""
+        try:
+            self._conn.send(('close',))
+        except OSError:
+            pass
+        self._process.join(self.SHUTDOWN_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(self.SHUTDOWN_TIMEOUT)
+        self._process = None
+        self._conn.close()
+        self._release_buffer()
+        _worker_slots.release()
+
+    def close(self):
+        """Stop the worker process."""
+        with self._lock:
+            if self._process is not None:
+                self._shutdown()
+
+
+def create_stretch_analyzer_process() -> Optional[StretchAnalyzerProcess]:
+    """Factory function to create a stretch analyzer in a worker process.
+
+    Returns:
+        The analyzer, or None if POSE_MAX_WORKERS workers are already running
+    """
+    try:
+        return StretchAnalyzerProcess()
+    except RuntimeError as e:
+        print(f"Warning: {e}. Analyzing frames in the app process.")
+        return None
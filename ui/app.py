@@ -1,37 +1,219 @@
 """Gradio UI for Burnout Prevention App."""
 import gradio as gr
-from datetime import datetime
-from typing import List, Tuple
+import asyncio
+import atexit
+import importlib.util
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import numpy as np
 
 from config import settings
 from config.gradio_theme import create_wellness_theme, CUSTOM_CSS
 from config.color_theme import StretchCategoryColors
 from tools.database_tools import get_db
-from agents.wellness_companion_agent import create_wellness_companion
-from agents.stretch_coach_agent import create_stretch_coach
-from agents.break_scheduler_agent import create_break_scheduler
-from tools.pose_detection import create_stretch_analyzer, MEDIAPIPE_AVAILABLE
+
+# Agents (LLM clients) and pose detection (OpenCV, MediaPipe) are imported
+# on first use so the UI comes up without loading them. Checking for
+# MediaPipe (or ONNX Runtime, if an ONNX pose model is configured) here
+# does not import it.
+POSE_DETECTION_AVAILABLE = importlib.util.find_spec("mediapipe") is not None or bool(
+    settings.ONNX_POSE_PATH and importlib.util.find_spec("onnxruntime")
+)
+
+
+class SessionState:
+    """State for one browser session: the logged-in user and their agents."""
+
+    def __init__(self):
+        """Initialize an empty (logged-out) session."""
+        self.current_user = None
+        # Agents for current_user, created when a tab first needs them
+        self.agents = {}
+        self.agents_user_id = None
+        # One analyzer (and MediaPipe Pose) per session, so pose tracking
+        # carries over between streamed frames. Created by the first AI
+        # stretch session, in its own worker process if enabled and one of
+        # the POSE_MAX_WORKERS is free.
+        self.stretch_analyzer = None
+        self.current_stretch_session = None
+        self.tracked_stretch_id = None
+        # Held while a camera frame is analyzed; frames arriving meanwhile
+        # are dropped and shown with the last feedback instead of queueing
+        self.frame_lock = threading.Lock()
+        self.last_feedback = ""
+        # Activity writes running in the background, applied one at a time,
+        # and a notice for the next stats refresh if one failed
+        self.pending_writes = set()
+        self.write_lock = asyncio.Lock()
+        self.write_error = None
+        self.stats_cache = {'at': 0.0, 'user_id': None, 'data': None}
+        self.achievements_cache = {'at': 0.0, 'user_id': None, 'data': None}
+
+    def _get_agent(self, name: str, factory):
+        """Get one of the current user's agents, creating it on first use."""
+        user_id = self.current_user.id
+        if self.agents_user_id != user_id:
+            self.agents = {}
+            self.agents_user_id = user_id
+
+        agent = self.agents.get(name)
+        if agent is None:
+            agent = self.agents[name] = factory(user_id)
+        return agent
+
+    def get_wellness_agent(self):
+        """Get the current user's wellness companion."""
+        from agents.wellness_companion_agent import create_wellness_companion
+        return self._get_agent('wellness', create_wellness_companion)
+
+    def get_stretch_coach(self):
+        """Get the current user's stretch coach."""
+        from agents.stretch_coach_agent import create_stretch_coach
+        return self._get_agent('stretch', create_stretch_coach)
+
+    def get_break_scheduler(self):
+        """Get the current user's break scheduler."""
+        from agents.break_scheduler_agent import create_break_scheduler
+        return self._get_agent('break', create_break_scheduler)
+
+    def get_stretch_analyzer(self):
+        """Get the stretch analyzer, loading pose detection on first use."""
+        if self.stretch_analyzer is None and POSE_DETECTION_AVAILABLE:
+            if settings.POSE_WORKER_PROCESS:
+                from tools.pose_worker import create_stretch_analyzer_process
+                self.stretch_analyzer = create_stretch_analyzer_process()
+            if self.stretch_analyzer is None:
+                from tools.pose_detection import create_stretch_analyzer
+                self.stretch_analyzer = create_stretch_analyzer()
+        return self.stretch_analyzer
+
+    def invalidate_stats(self):
+        """Drop the cached stats and achievements after an activity is recorded."""
+        self.stats_cache['at'] = 0.0
+        self.achievements_cache['at'] = 0.0
+
+    def close(self):
+        """Release the session's pose detector (and its worker process)."""
+        if self.stretch_analyzer:
+            self.stretch_analyzer.close()
+            self.stretch_analyzer = None
 
 
 class WellnessApp:
-    """Main application UI."""
+    """Main application UI.
+
+    Handlers receive the Gradio request and keep all user-specific state in
+    a SessionState per browser session, so concurrent users (or tabs) do not
+    share a login, agents or stretch session.
+    """
+
+    # Seconds rendered stats and achievements are reused for repeated
+    # refreshes; recording an activity in this session drops them sooner
+    STATS_CACHE_SECONDS = 15.0
+
+    # Form score above which a frame counts as good form
+    GOOD_FORM_SCORE = 70
+
+    # Frames of form scores preallocated per AI stretch session (30 minutes
+    # at the camera's 10 fps); longer sessions grow the buffer
+    SCORE_BUFFER_FRAMES = 1800
+
+    # Live feedback shown under the camera, filled in for every frame
+    # (the stretch name heading is built once per session)
+    FRAME_FEEDBACK_TEMPLATE = """**Real-time Feedback:** {feedback}
+**Form Score:** {score}%
+
+**Session Stats:**
+- Frames analyzed: {frames}
+- Good form frames: {good_frames}
+- Form accuracy: {accuracy:.1f}%
+
+{encouragement}
+"""
+    GOOD_FORM_MESSAGE = '✅ Great job! Keep holding this position!'
+    KEEP_GOING_MESSAGE = '💪 You can do it! Follow the guidance above.'
+
+    # Event queue settings: events handled in parallel and queued at most
+    QUEUE_CONCURRENCY = 8
+    QUEUE_MAX_SIZE = 64
+
+    # Per-event limits: chat waits on the LLM, so it shares the default
+    # pool; cached stats refreshes are cheap. Pose detection is CPU-bound,
+    # so few frames run at once across all sessions (each session already
+    # has at most one in flight).
+    CHAT_CONCURRENCY = 8
+    REFRESH_CONCURRENCY = 16
+    CAMERA_CONCURRENCY = 2
 
     def __init__(self):
         """Initialize the wellness app."""
         self.db = get_db()
-        self.current_user = None
-        self.wellness_agent = None
-        self.stretch_coach = None
-        self.break_scheduler = None
-        self.stretch_analyzer = create_stretch_analyzer() if MEDIAPIPE_AVAILABLE else None
-        self.current_stretch_session = None
+        self._sessions: Dict[Optional[str], SessionState] = {}
+        self._sessions_lock = threading.Lock()
+
+        # The stretch library is static, so its listing is rendered once
+        self._stretch_list_display = None
+
+    def _session(self, request: Optional[gr.Request]) -> SessionState:
+        """Get (or create) the state for the session making a request."""
+        key = request.session_hash if request is not None else None
+        with self._sessions_lock:
+            state = self._sessions.get(key)
+            if state is None:
+                state = SessionState()
+                self._sessions[key] = state
+            return state
+
+    def end_session(self, request: gr.Request = None):
+        """Forget a session's state when its page is closed."""
+        key = request.session_hash if request is not None else None
+        with self._sessions_lock:
+            state = self._sessions.pop(key, None)
+        if state:
+            state.close()
+
+    def close(self):
+        """Close every session's pose detector (on shutdown)."""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for state in sessions:
+            state.close()
+
+    def _persist(self, state: SessionState, write, *args, **kwargs):
+        """Run an activity write in the background.
+
+        The handler replies straight away from values it already knows;
+        the cached stats are dropped once the write has landed.
 
-    def initialize_user(self, username: str) -> str:
+        Args:
+            state: Session the activity belongs to
+            write: Blocking function doing the database writes
+            *args: Arguments for write
+            **kwargs: Keyword arguments for write
+        """
+        async def run():
+            async with state.write_lock:
+                try:
+                    await asyncio.to_thread(write, *args, **kwargs)
+                except Exception as e:
+                    print(f"Error saving activity: {e}")
+                    state.write_error = "Your last activity could not be saved. Please try again."
+                finally:
+                    state.invalidate_stats()
+
+        task = asyncio.create_task(run())
+        state.pending_writes.add(task)
+        task.add_done_callback(state.pending_writes.discard)
+
+    def initialize_user(self, username: str, request: gr.Request = None) -> str:
         """Initialize or get user."""
         if not username:
             return "Please enter a username"
 
+        state = self._session(request)
+
         # Check if user exists
         user = self.db.get_user_by_username(username)
 
@@ -42,26 +224,34 @@ class WellnessApp:
         else:
             message = f"Welcome back, {username}! 👋"
 
-        self.current_user = user
-
-        # Initialize agents
-        self.wellness_agent = create_wellness_companion(user.id)
-        self.stretch_coach = create_stretch_coach(user.id)
-        self.break_scheduler = create_break_scheduler(user.id)
+        # Agents are created by the tabs that use them
+        state.current_user = user
 
         # Get stats
-        stats = self.get_stats_display()
+        stats = self.get_stats_display(request)
 
         return f"{message}\n\n{stats}"
 
-    def get_stats_display(self) -> str:
+    def get_stats_display(self, request: gr.Request = None) -> str:
         """Get formatted stats display with color-coded pet evolution."""
-        if not self.current_user:
+        state = self._session(request)
+        if not state.current_user:
             return "Please log in first"
 
-        user = self.db.get_user(self.current_user.id)
-        pet = self.db.get_pet(user.id)
-        stats = self.db.get_user_stats(user.id, days=7)
+        now = time.monotonic()
+        if state.write_error:
+            error, state.write_error = state.write_error, None
+            state.invalidate_stats()
+            return f"<span class='error-message'>{error}</span>\n\n{self.get_stats_display(request)}"
+
+        cache = state.stats_cache
+        if cache['user_id'] == state.current_user.id and now - cache['at'] < self.STATS_CACHE_SECONDS:
+            return cache['data']
+
+        dashboard = self.db.get_dashboard(state.current_user.id, days=7)
+        user = dashboard['user']
+        pet = dashboard['pet']
+        stats = dashboard['stats']
 
         # Get pet stage class for color coding
         pet_stage_class = f"pet-{pet.evolution_stage}" if pet else ""
@@ -92,35 +282,48 @@ class WellnessApp:
 
 </div>
 """
+        state.stats_cache = {'at': now, 'user_id': user.id, 'data': display}
         return display
 
-    def chat_interface(self, message: str, history: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], str]:
-        """Handle chat interaction."""
-        if not self.current_user:
-            return history + [(message, "Please log in first using the Setup tab.")], ""
-
-        if not self.wellness_agent:
-            self.wellness_agent = create_wellness_companion(self.current_user.id)
-
-        # Get response
-        result = self.wellness_agent.chat(message)
-        response = result['response']
-
-        # Update history
-        history.append((message, response))
+    async def chat_interface(self, message: str, history: List[Dict[str, str]],
+                             request: gr.Request = None) -> AsyncIterator[Tuple[List[Dict[str, str]], str]]:
+        """Handle chat interaction, streaming the reply into the chat.
 
-        return history, ""
-
-    def take_break(self) -> str:
-        """Record a break."""
-        if not self.current_user:
+        History uses Gradio's messages format (role/content dicts). Gradio
+        hands each call a fresh list, so it is extended in place.
+        """
+        state = self._session(request)
+        history.append({"role": "user", "content": message})
+        if not state.current_user:
+            history.append({"role": "assistant", "content": "Please log in first using the Setup tab."})
+            yield history, ""
+            return
+
+        wellness_agent = await asyncio.to_thread(state.get_wellness_agent)
+
+        # Show the user's message right away, then fill in the reply
+        reply = {"role": "assistant", "content": ""}
+        history.append(reply)
+        yield history, ""
+        async for chunk in wellness_agent.achat_stream(message):
+            reply["content"] += chunk
+            yield history, ""
+
+        state.invalidate_stats()
+
+    async def take_break(self, request: gr.Request = None) -> str:
+        """Record a break (saved in the background)."""
+        state = self._session(request)
+        if not state.current_user:
             return "Please log in first"
 
-        result = self.break_scheduler.record_break()
+        # Creating the agent loads the user's history, so keep it off the loop
+        scheduler = await asyncio.to_thread(state.get_break_scheduler)
+        self._persist(state, scheduler.record_break)
 
         message = f"""<span class='success-message'>✅ **Break Recorded!**</span>
 
-You earned **{result['points_earned']} points!** 💎
+You earned **{settings.POINTS_PER_BREAK} points!** 💎
 
 Your pet gained **{settings.PET_HEALTH_GAIN_PER_BREAK} health!** ❤️
 
@@ -128,14 +331,21 @@ Your pet gained **{settings.PET_HEALTH_GAIN_PER_BREAK} health!** ❤️
 """
         return message
 
-    def get_stretch_list(self) -> str:
+    def get_stretch_list(self, request: gr.Request = None) -> str:
         """Get list of available stretches with color-coded categories."""
-        if not self.current_user:
+        state = self._session(request)
+        if not state.current_user:
             return "Please log in first"
 
-        stretches = self.stretch_coach.get_all_stretches()
+        if self._stretch_list_display is None:
+            self._stretch_list_display = self._render_stretch_list(
+                state.get_stretch_coach().get_all_stretches()
+            )
+        return self._stretch_list_display
 
-        display = "**Available Stretches:**\n\n"
+    def _render_stretch_list(self, stretches: List[Dict[str, Any]]) -> str:
+        """Render the stretch library as Markdown grouped by category."""
+        parts = ["**Available Stretches:**\n\n"]
 
         # Group by category for better organization
         categories = {}
@@ -155,182 +365,258 @@ Your pet gained **{settings.PET_HEALTH_GAIN_PER_BREAK} health!** ❤️
             # Create category-specific class
             category_class = f"category-{category.lower().replace(' & ', '-').replace(' ', '-')}"
 
-            display += f"<div class='{category_class}' style='padding: 10px; margin-bottom: 15px; border-radius: 5px;'>\n\n"
-            display += f"### {emoji} {category}\n"
+            parts.append(f"<div class='{category_class}' style='padding: 10px; margin-bottom: 15px; border-radius: 5px;'>\n\n")
+            parts.append(f"### {emoji} {category}\n")
             if psychology:
-                display += f"*{psychology}*\n\n"
+                parts.append(f"*{psychology}*\n\n")
 
             # Show stretches in this category (limit to 3 per category)
             for stretch in category_stretches[:3]:
-                display += f"**{stretch['name']}** (ID: `{stretch.get('id', 'N/A')}`) - {stretch['difficulty']}\n"
-                display += f"- Duration: {stretch['duration_seconds']}s | Points: {stretch['points']}\n"
-                display += f"- {stretch['description']}\n\n"
+                parts.append(
+                    f"**{stretch['name']}** (ID: `{stretch.get('id', 'N/A')}`) - {stretch['difficulty']}\n"
+                    f"- Duration: {stretch['duration_seconds']}s | Points: {stretch['points']}\n"
+                    f"- {stretch['description']}\n\n"
+                )
 
             if len(category_stretches) > 3:
-                display += f"*...and {len(category_stretches) - 3} more in this category*\n\n"
+                parts.append(f"*...and {len(category_stretches) - 3} more in this category*\n\n")
 
-            display += "</div>\n\n"
+            parts.append("</div>\n\n")
 
-        return display
+        return "".join(parts)
 
-    def complete_stretch(self, stretch_id: str) -> str:
-        """Complete a stretch."""
-        if not self.current_user:
+    async def complete_stretch(self, stretch_id: str, request: gr.Request = None) -> str:
+        """Complete a stretch (saved in the background)."""
+        state = self._session(request)
+        if not state.current_user:
             return "Please log in first"
 
         if not stretch_id:
             return "<span class='warning-message'>Please enter a stretch ID</span>"
 
-        result = self.stretch_coach.complete_stretch(stretch_id)
+        stretch_coach = await asyncio.to_thread(state.get_stretch_coach)
+        stretch = stretch_coach.get_stretch_by_id(stretch_id)
+        if not stretch:
+            return "<span class='error-message'>Error: Stretch not found</span>"
 
-        if 'error' in result:
-            return f"<span class='error-message'>Error: {result['error']}</span>"
+        self._persist(state, stretch_coach.complete_stretch, stretch_id)
+        points = stretch.get('points', settings.POINTS_PER_STRETCH)
 
-        message = f"""<span class='success-message'>✅ **{result['stretch_name']} Completed!**</span>
+        message = f"""<span class='success-message'>✅ **{stretch['name']} Completed!**</span>
 
-You earned **{result['points_earned']} points!** 💎
+You earned **{points} points!** 💎
 
 Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
 
-<span class='info-message'>{result['message']}</span>
+<span class='info-message'>Excellent work! You earned {points} points!</span>
 """
         return message
 
-    def get_achievements(self) -> str:
+    def get_achievements(self, request: gr.Request = None) -> str:
         """Get user achievements with color-coded tiers."""
-        if not self.current_user:
+        state = self._session(request)
+        if not state.current_user:
             return "Please log in first"
 
-        achievements = self.db.get_user_achievements(self.current_user.id)
+        now = time.monotonic()
+        cache = state.achievements_cache
+        if cache['user_id'] == state.current_user.id and now - cache['at'] < self.STATS_CACHE_SECONDS:
+            return cache['data']
 
-        unlocked = [a for a in achievements if a['unlocked']]
-        locked = [a for a in achievements if not a['unlocked']]
+        achievements = self.db.get_user_achievements(state.current_user.id)
 
-        display = f"**🏆 Achievements ({len(unlocked)}/{len(achievements)} unlocked)**\n\n"
+        # Split into unlocked and locked in one pass
+        unlocked, locked = [], []
+        for ach in achievements:
+            (unlocked if ach['unlocked'] else locked).append(ach)
 
-        display += "**Unlocked:**\n"
+        parts = [f"**🏆 Achievements ({len(unlocked)}/{len(achievements)} unlocked)**\n\n"]
+
+        parts.append("**Unlocked:**\n")
         for ach in unlocked[:10]:  # Show first 10
             tier_class = f"tier-{ach['tier'].lower()}"
-            display += f"{ach['icon']} **{ach['name']}** <span class='{tier_class}'>({ach['tier'].upper()})</span>\n"
-            display += f"  {ach['description']}\n\n"
+            parts.append(
+                f"{ach['icon']} **{ach['name']}** <span class='{tier_class}'>({ach['tier'].upper()})</span>\n"
+                f"  {ach['description']}\n\n"
+            )
 
         if locked:
-            display += "\n**Locked:**\n"
+            parts.append("\n**Locked:**\n")
             for ach in locked[:10]:  # Show first 10
                 tier_class = f"tier-{ach['tier'].lower()}"
-                display += f"🔒 **{ach['name']}** <span class='{tier_class}'>({ach['tier'].upper()})</span>\n"
-                display += f"  {ach['description']}\n\n"
+                parts.append(
+                    f"🔒 **{ach['name']}** <span class='{tier_class}'>({ach['tier'].upper()})</span>\n"
+                    f"  {ach['description']}\n\n"
+                )
 
+        display = "".join(parts)
+        state.achievements_cache = {'at': now, 'user_id': state.current_user.id, 'data': display}
         return display
 
-    def start_ai_stretch_session(self, stretch_id: str) -> str:
+    def start_ai_stretch_session(self, stretch_id: str, request: gr.Request = None) -> str:
         """Start an AI-guided stretch session.
 
         Args:
             stretch_id: ID of the stretch to perform
+            request: Gradio request identifying the session
 
         Returns:
             Status message
         """
-        if not self.current_user:
+        state = self._session(request)
+        if not state.current_user:
             return "Please log in first"
 
-        if not MEDIAPIPE_AVAILABLE:
+        if not POSE_DETECTION_AVAILABLE:
             return "AI stretch guidance requires MediaPipe to be installed. Run: pip install mediapipe"
 
-        if not self.stretch_coach:
-            return "Stretch coach not initialized"
-
         # Get stretch details
-        stretch = self.stretch_coach.get_stretch_by_id(stretch_id)
+        stretch = state.get_stretch_coach().get_stretch_by_id(stretch_id)
         if not stretch:
             return f"Stretch not found: {stretch_id}"
 
-        # Start session
-        self.current_stretch_session = {
-            'stretch_id': stretch_id,
-            'stretch_name': stretch['name'],
-            'stretch_type': stretch.get('category', 'general'),
-            'started_at': datetime.utcnow(),
-            'frames_analyzed': 0,
-            'good_form_frames': 0
-        }
+        stretch_analyzer = state.get_stretch_analyzer()
+
+        # Waits for a frame still being analyzed, so the detector is not
+        # reset (or the session replaced) under it
+        with state.frame_lock:
+            # Tracking state only carries over between sessions of the same stretch
+            if stretch_analyzer and stretch_id != state.tracked_stretch_id:
+                stretch_analyzer.reset()
+                state.tracked_stretch_id = stretch_id
+
+            # Start session
+            state.current_stretch_session = {
+                'stretch_id': stretch_id,
+                'stretch_name': stretch['name'],
+                'stretch_type': stretch.get('category', 'general'),
+                'feedback_header': f"**{stretch['name']}**\n\n",
+                'started_at': time.monotonic(),  # for durations, not wall-clock time
+                'frames_analyzed': 0,
+                # Form score of each analyzed frame (0 where the form was invalid)
+                'scores': np.zeros(self.SCORE_BUFFER_FRAMES, dtype=np.uint8)
+            }
 
         return f"Starting AI-guided session for: {stretch['name']}\n\nPosition yourself in front of the camera and begin your stretch!"
 
-    def analyze_stretch_frame(self, image: np.ndarray) -> Tuple[np.ndarray, str]:
+    async def analyze_stretch_frame(self, image: np.ndarray,
+                                    request: gr.Request = None) -> Tuple[np.ndarray, str]:
         """Analyze a frame from the camera during a stretch session.
 
+        Pose detection runs in a worker thread so the event loop keeps
+        serving other events while a frame is analyzed; with
+        POSE_WORKER_PROCESS that thread only waits on the session's pose
+        worker, so chat streaming does not compete with it for the GIL.
+
         Args:
             image: Camera frame
+            request: Gradio request identifying the session
 
         Returns:
             Tuple of (annotated image, feedback text)
         """
-        if not self.current_stretch_session:
+        state = self._session(request)
+        session = state.current_stretch_session
+        if not session:
             return image, "No active stretch session. Start a session first!"
 
-        if not self.stretch_analyzer:
+        if not state.stretch_analyzer:
             return image, "AI pose detection not available"
 
         if image is None:
             return None, "No camera input detected"
 
-        # Analyze the stretch
-        stretch_type = self.current_stretch_session['stretch_type']
-        annotated_image, analysis = self.stretch_analyzer.analyze_stretch(image, stretch_type)
+        # Skip this frame if the previous one is still being analyzed
+        if not state.frame_lock.acquire(blocking=False):
+            return image, state.last_feedback
 
-        # Update session stats
-        self.current_stretch_session['frames_analyzed'] += 1
-        if analysis.get('valid', False) and analysis.get('score', 0) > 70:
-            self.current_stretch_session['good_form_frames'] += 1
+        try:
+            annotated_image, state.last_feedback = await asyncio.to_thread(
+                self._analyze_frame, state, session, image
+            )
+        finally:
+            state.frame_lock.release()
+
+        return annotated_image, state.last_feedback
+
+    def _analyze_frame(self, state: SessionState, session: Dict[str, Any],
+                       image: np.ndarray) -> Tuple[np.ndarray, str]:
+        """Analyze one camera frame for a stretch session.
+
+        Works on the session the frame arrived for, even if it is completed
+        or replaced while the frame is analyzed.
+        """
+        # Analyze the stretch
+        stretch_type = session['stretch_type']
+        # Gradio delivers RGB frames, which MediaPipe takes without conversion
+        annotated_image, analysis = state.stretch_analyzer.analyze_stretch(
+            image, stretch_type, rgb=True
+        )
 
         # Generate feedback
         feedback = analysis.get('feedback', 'Keep stretching!')
         score = analysis.get('score', 0)
 
-        frames = self.current_stretch_session['frames_analyzed']
-        good_frames = self.current_stretch_session['good_form_frames']
-
-        detailed_feedback = f"""**{self.current_stretch_session['stretch_name']}**
-
-**Real-time Feedback:** {feedback}
-**Form Score:** {score}%
+        # Update session stats
+        frames = session['frames_analyzed']
+        if frames == len(session['scores']):
+            session['scores'] = np.resize(session['scores'], 2 * frames)
+        session['scores'][frames] = score if analysis.get('valid', False) else 0
+        frames += 1
+        session['frames_analyzed'] = frames
+        good_frames = self._good_form_frames(session)
+
+        detailed_feedback = session['feedback_header'] + self.FRAME_FEEDBACK_TEMPLATE.format(
+            feedback=feedback,
+            score=score,
+            frames=frames,
+            good_frames=good_frames,
+            accuracy=good_frames / frames * 100,
+            encouragement=self.GOOD_FORM_MESSAGE if score > 80 else self.KEEP_GOING_MESSAGE
+        )
 
-**Session Stats:**
-- Frames analyzed: {frames}
-- Good form frames: {good_frames}
-- Form accuracy: {(good_frames/frames*100):.1f}%
+        return annotated_image, detailed_feedback
 
-{'✅ Great job! Keep holding this position!' if score > 80 else '💪 You can do it! Follow the guidance above.'}
-"""
+    def _good_form_frames(self, session: Dict[str, Any]) -> int:
+        """Count the frames of a stretch session scored as good form."""
+        scores = session['scores'][:session['frames_analyzed']]
+        return int(np.count_nonzero(scores > self.GOOD_FORM_SCORE))
 
-        return annotated_image, detailed_feedback
+    async def complete_ai_stretch_session(self, request: gr.Request = None) -> str:
+        """Complete the current AI stretch session (saved in the background).
 
-    def complete_ai_stretch_session(self) -> str:
-        """Complete the current AI stretch session.
+        Args:
+            request: Gradio request identifying the session
 
         Returns:
             Completion message with stats
         """
-        if not self.current_stretch_session:
+        state = self._session(request)
+        session = state.current_stretch_session
+        if not session:
             return "No active stretch session"
 
-        if not self.current_user:
+        if not state.current_user:
             return "Please log in first"
 
         # Calculate performance
-        frames = self.current_stretch_session['frames_analyzed']
-        good_frames = self.current_stretch_session['good_form_frames']
+        frames = session['frames_analyzed']
+        good_frames = self._good_form_frames(session)
 
         if frames < 10:
             return "Session too short. Please perform the stretch for longer (at least 10 seconds) for it to count."
 
+        # Clear the session before the first await, so a second click
+        # arriving meanwhile finds no session instead of saving it again
+        state.current_stretch_session = None
+
         accuracy = (good_frames / frames * 100) if frames > 0 else 0
 
-        # Complete the stretch
-        stretch_id = self.current_stretch_session['stretch_id']
-        result = self.stretch_coach.complete_stretch(stretch_id)
+        # Base points from the stretch definition
+        stretch_id = session['stretch_id']
+        stretch_coach = await asyncio.to_thread(state.get_stretch_coach)
+        stretch = stretch_coach.get_stretch_by_id(stretch_id) or {}
+        points = stretch.get('points', settings.POINTS_PER_STRETCH)
 
         # Add bonus points for good form
         bonus_points = 0
@@ -341,14 +627,11 @@ Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
         elif accuracy > 60:
             bonus_points = 5
 
-        if bonus_points > 0:
-            # Award bonus points
-            user = self.db.get_user(self.current_user.id)
-            self.db.update_user_points(self.current_user.id, user.total_points + bonus_points)
+        # Base and bonus points are saved together in one transaction
+        self._persist(state, stretch_coach.complete_stretch,
+                      stretch_id, bonus_points=bonus_points)
 
-        # Clear session
-        session_name = self.current_stretch_session['stretch_name']
-        self.current_stretch_session = None
+        session_name = session['stretch_name']
 
         message = f"""✅ **{session_name} Session Completed!**
 
@@ -358,11 +641,11 @@ Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
 - Good Form Frames: {good_frames}
 
 **Rewards:**
-- Base Points: {result.get('points_earned', 0)} 💎
+- Base Points: {points} 💎
 - Form Bonus: {bonus_points} 💎
-- Total Points: {result.get('points_earned', 0) + bonus_points} 💎
+- Total Points: {points + bonus_points} 💎
 
-{result.get('message', 'Great work!')}
+Excellent work! You earned {points} points!
 
 {'🌟 Perfect form! You are a stretch master!' if accuracy > 90 else ''}
 {'💪 Excellent form! Keep it up!' if 75 < accuracy <= 90 else ''}
@@ -413,7 +696,7 @@ Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
                 # Chat Tab
                 with gr.Tab("💬 Wellness Companion"):
                     gr.Markdown("## Chat with your AI wellness companion")
-                    chatbot = gr.Chatbot(height=400)
+                    chatbot = gr.Chatbot(height=400, type="messages")
                     msg = gr.Textbox(
                         label="Your message",
                         placeholder="How are you feeling today?",
@@ -428,10 +711,11 @@ Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
                     # Start conversation button
                     start_chat_btn = gr.Button("Start New Conversation")
 
-                    def start_new_chat():
-                        if self.wellness_agent:
-                            greeting = self.wellness_agent.start_conversation()
-                            return [(None, greeting)]
+                    def start_new_chat(request: gr.Request):
+                        state = self._session(request)
+                        if state.current_user:
+                            greeting = state.get_wellness_agent().start_conversation()
+                            return [{"role": "assistant", "content": greeting}]
                         return []
 
                     start_chat_btn.click(fn=start_new_chat, outputs=[chatbot])
@@ -439,12 +723,18 @@ Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
                     send_btn.click(
                         fn=self.chat_interface,
                         inputs=[msg, chatbot],
-                        outputs=[chatbot, msg]
+                        outputs=[chatbot, msg],
+                        queue=True,
+                        concurrency_limit=self.CHAT_CONCURRENCY,
+                        concurrency_id="chat"
                     )
                     msg.submit(
                         fn=self.chat_interface,
                         inputs=[msg, chatbot],
-                        outputs=[chatbot, msg]
+                        outputs=[chatbot, msg],
+                        queue=True,
+                        concurrency_limit=self.CHAT_CONCURRENCY,
+                        concurrency_id="chat"
                     )
 
                 # Breaks Tab
@@ -471,7 +761,7 @@ Your pet gained **{settings.PET_HAPPINESS_GAIN_PER_STRETCH} happiness!** 😊
 
                     with gr.Tabs():
                         # AI-Guided Stretches
-                        with gr.Tab("🎥 AI Camera Guidance" + (" (Available)" if MEDIAPIPE_AVAILABLE else " (Install MediaPipe)")):
+                        with gr.Tab("🎥 AI Camera Guidance" + (" (Available)" if POSE_DETECTION_AVAILABLE else " (Install MediaPipe)")):
                             gr.Markdown("""
 ### AI-Powered Stretch Coach
 
@@ -505,6 +795,8 @@ Let AI guide your stretches in real-time! The camera will track your body positi
                                     camera_feed = gr.Image(
                                         sources=["webcam"],
                                         streaming=True,
+                                        type="numpy",
+                                        image_mode="RGB",
                                         label="Camera Feed with AI Pose Detection"
                                     )
                                     feedback_display = gr.Markdown("**Waiting for session to start...**")
@@ -527,7 +819,8 @@ Let AI guide your stretches in real-time! The camera will track your body positi
                                 fn=self.analyze_stretch_frame,
                                 inputs=[camera_feed],
                                 outputs=[camera_feed, feedback_display],
-                                stream_every=0.1  # Analyze 10 frames per second
+                                stream_every=0.1,  # Analyze 10 frames per second
+                                concurrency_limit=self.CAMERA_CONCURRENCY
                             )
 
                             complete_session_btn.click(
@@ -580,7 +873,9 @@ Let AI guide your stretches in real-time! The camera will track your body positi
 
                     refresh_btn.click(
                         fn=self.get_stats_display,
-                        outputs=[stats_output]
+                        outputs=[stats_output],
+                        concurrency_limit=self.REFRESH_CONCURRENCY,
+                        concurrency_id="refresh"
                     )
 
                 # Achievements Tab
@@ -596,9 +891,14 @@ Let AI guide your stretches in real-time! The camera will track your body positi
 
                     refresh_ach_btn.click(
                         fn=self.get_achievements,
-                        outputs=[ach_output]
+                        outputs=[ach_output],
+                        concurrency_limit=self.REFRESH_CONCURRENCY,
+                        concurrency_id="refresh"
                     )
 
+            # Free a session's agents and pose detector when its page closes
+            app.unload(self.end_session)
+
             gr.Markdown("""
 ---
 **Tips for preventing burnout:**
@@ -615,7 +915,18 @@ Let AI guide your stretches in real-time! The camera will track your body positi
 def create_app() -> gr.Blocks:
     """Create and return the Gradio app."""
     wellness_app = WellnessApp()
-    return wellness_app.build_ui()
+    app = wellness_app.build_ui()
+
+    # Release MediaPipe graphs still open when the server stops
+    atexit.register(wellness_app.close)
+
+    # Handle several sessions' events at once instead of one at a time
+    app.queue(
+        default_concurrency_limit=WellnessApp.QUEUE_CONCURRENCY,
+        max_size=WellnessApp.QUEUE_MAX_SIZE,
+        api_open=False
+    )
+    return app
 
 
 if __name__ == "__main__":
@@ -623,5 +934,6 @@ if __name__ == "__main__":
     app.launch(
         server_name=settings.GRADIO_SERVER_NAME,
         server_port=settings.GRADIO_SERVER_PORT,
-        share=settings.SHARE_GRADIO
+        share=settings.SHARE_GRADIO,
+        max_threads=16
     )